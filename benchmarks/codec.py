@@ -0,0 +1,53 @@
+import argparse
+import json
+import timeit
+
+from syncano.codec import available_codecs, get_codec
+from benchmarks import payloads
+
+
+def payload_cases():
+    return [
+        ('data.get x100', payloads.data_get_response(100)),
+        ('data.get x1000', payloads.data_get_response(1000)),
+        ('data.new call', payloads.data_new_call()),
+        ('notification', payloads.notification()),
+        ('ping', payloads.ping()),
+    ]
+
+
+def measure(func, number):
+    best = min(timeit.repeat(func, number=number, repeat=3))
+    return number / best
+
+
+def run(number=200):
+    results = []
+    for case, payload in payload_cases():
+        iterations = max(10, number * 10000 // len(json.dumps(payload)))
+        for name in available_codecs():
+            codec = get_codec(name)
+            frame = codec.dump_frame(payload)
+            text = frame.decode('utf-8')
+            results.append(dict(case=case, codec=name, bytes=len(frame),
+                                encode_ops=measure(lambda: codec.dump_frame(payload), iterations),
+                                decode_ops=measure(lambda: codec.loads(text), iterations)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON codecs on Syncano payloads')
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    results = run(args.number)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('{0:<16} {1:<11} {2:>9} {3:>14} {4:>14}'.format('payload', 'codec', 'bytes', 'encode ops/s', 'decode ops/s'))
+    for r in results:
+        print('{case:<16} {codec:<11} {bytes:>9} {encode_ops:>14.0f} {decode_ops:>14.0f}'.format(**r))
+
+
+if __name__ == '__main__':
+    main()
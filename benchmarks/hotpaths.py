@@ -0,0 +1,210 @@
+import argparse
+import json
+import platform
+import socket
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from syncano.callbacks import DataObject, JsonCallback, ObjectCallback
+from syncano.client import SyncanoApi, SyncanoAsyncApi
+from syncano.frames import FrameCallback, numpy
+from syncano.schema import annotate_result
+from syncano.testing import FakeSyncanoServer
+from benchmarks import payloads
+from benchmarks.codec import measure
+
+
+def allocations(func, number):
+    if tracemalloc is None:
+        return None, None
+    func()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    func()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    for _ in range(number - 1):
+        func()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return peak, retained // number
+
+
+def frames(messages):
+    return b''.join((json.dumps(m) + '\n').encode('utf-8') for m in messages)
+
+
+def drain(sock):
+    try:
+        while sock.recv(1 << 20):
+            pass
+    except socket.error:
+        pass
+
+
+class Bench(object):
+
+    def __init__(self, api, object_api):
+        self.api = api
+        self.object_api = object_api
+        self.cli = api.cli
+        self.peer = None
+
+    def reset_results(self):
+        self.cli.results.clear()
+        self.cli.responses.clear()
+
+    def handle_read(self, chunks):
+        cli = self.cli
+        pending = list(chunks)
+
+        def recv(size):
+            return pending.pop()
+
+        cli.recv = recv
+
+        def op():
+            pending[:] = reversed(chunks)
+            while pending:
+                cli.handle_read()
+            self.reset_results()
+        return op
+
+    def write_to_buffer(self, messages):
+        cli = self.cli
+
+        def op():
+            for message in messages:
+                cli.write_to_buffer(message)
+            cli.frames_out.clear()
+            cli.frame_ids.clear()
+            cli.pending_bytes = 0
+            cli.telemetry.sent_at.clear()
+        return op
+
+    def handle_write(self, messages):
+        cli = self.cli
+        local, peer = socket.socketpair()
+        peer.setblocking(False)
+        cli.del_channel()
+        cli.socket.close()
+        cli.set_socket(local, cli.map)
+        cli.connected = True
+        self.peer = peer
+
+        def op():
+            for message in messages:
+                cli.write_to_buffer(message)
+            while cli.frames_out:
+                cli.handle_write()
+                drain(peer)
+            cli.telemetry.sent_at.clear()
+        return op
+
+    def close(self):
+        if self.peer is not None:
+            self.peer.close()
+        self.object_api.close()
+        self.api.close()
+
+    def process_message(self, message, callback):
+        process_message = callback.process_message
+        return lambda: process_message(message)
+
+    def process_and_iterate(self, message, callback):
+        process_message = callback.process_message
+
+        def op():
+            for _ in process_message(message):
+                pass
+        return op
+
+    def getattr(self, api, *names):
+        def op():
+            obj = api
+            for name in names:
+                obj = getattr(obj, name)
+        return op
+
+    def annotate_result(self, obj, params):
+        api = self.object_api
+        fields = ('project_id', 'collection_id', 'collection_key')
+        return lambda: annotate_result(api, fields, params, obj)
+
+
+def cases(bench, sizes):
+    small = [payloads.data_get_response(1, message_id=str(i), text_size=20) for i in range(100)]
+    page = frames([payloads.data_get_response(1000)])
+    page_chunks = [page[i:i + bench.cli.read_size] for i in range(0, len(page), bench.cli.read_size)]
+    calls = [payloads.data_new_call(message_id=str(i)) for i in range(100)]
+    json_callback = JsonCallback(bench.cli, syncano=bench.api)
+    object_callback = ObjectCallback(bench.cli, syncano=bench.object_api)
+    frame_callback = FrameCallback(bench.cli) if numpy is not None else None
+    yield 'handle_read 100 frames', 100, bench.handle_read([frames(small)])
+    yield 'handle_read data.get x1000', 1, bench.handle_read(page_chunks)
+    yield 'write_to_buffer 100 calls', 100, bench.write_to_buffer(calls)
+    yield 'handle_write 100 calls', 100, bench.handle_write(calls)
+    yield 'process_message callresponse', 1, bench.process_message(small[0], json_callback)
+    yield 'process_message ping', 1, bench.process_message(payloads.ping(), json_callback)
+    yield 'process_message notification', 1, bench.process_message(payloads.notification(), json_callback)
+    for size in sizes:
+        response = payloads.data_get_response(size, text_size=50)
+        yield ('process_callresponse x{0}'.format(size), size,
+               bench.process_message(response, object_callback))
+        yield ('process_callresponse iterated x{0}'.format(size), size,
+               bench.process_and_iterate(response, object_callback))
+        if frame_callback is not None:
+            yield ('process_callresponse frame x{0}'.format(size), size,
+                   bench.process_message(response, frame_callback))
+    yield 'getattr api.cli', 1, bench.getattr(bench.api, 'cli')
+    yield 'getattr api.data_get_one', 1, bench.getattr(bench.api, 'data_get_one')
+    yield 'getattr api.data.get_one', 1, bench.getattr(bench.api, 'data', 'get_one')
+    yield 'getattr sync api.data.get_one', 1, bench.getattr(bench.object_api, 'data', 'get_one')
+    obj = DataObject(None, payloads.data_object(1))
+    yield 'annotate_result data_get_one', 1, bench.annotate_result(obj, dict(project_id='1', collection_id='2'))
+
+
+def run(number=1000, sizes=(10, 1000, 100000), only=None):
+    results = []
+    with FakeSyncanoServer() as server:
+        api = SyncanoAsyncApi(server.instance, server.api_key, **server.client_kwargs())
+        object_api = SyncanoApi(server.instance, server.api_key, callback_handler=ObjectCallback,
+                                **server.client_kwargs())
+        bench = Bench(api, object_api)
+        try:
+            for case, items, op in cases(bench, sizes):
+                if only and only not in case:
+                    continue
+                iterations = max(3, number // items)
+                ops = measure(op, iterations)
+                peak, retained = allocations(op, min(iterations, 100))
+                results.append(dict(case=case, items=items, ops=ops, items_per_sec=ops * items,
+                                    peak_bytes=peak, retained_bytes=retained))
+        finally:
+            bench.close()
+    return dict(python=platform.python_implementation() + ' ' + platform.python_version(),
+                codec=api.cli.codec.name, number=number, results=results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure client hot paths in isolation')
+    parser.add_argument('--number', type=int, default=1000, help='items processed per timing run')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help='data.get page sizes for ObjectCallback')
+    parser.add_argument('--only', help='run cases containing this text')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    report = run(args.number, args.sizes, args.only)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print('{0} codec={1}'.format(report['python'], report['codec']))
+    print('{0:<32} {1:>12} {2:>14} {3:>12} {4:>12}'.format('case', 'ops/s', 'items/s', 'peak B', 'retained B'))
+    for r in report['results']:
+        print('{case:<32} {ops:>12.1f} {items_per_sec:>14.0f} {peak_bytes!s:>12} {retained_bytes!s:>12}'.format(**r))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# coding=utf8
+import random
+import string
+
+
+def random_text(size, rnd=random):
+    return ''.join(rnd.choice(string.ascii_letters + u' ąęłóżźćń') for _ in range(size))
+
+
+def data_object(data_id, rnd=random, text_size=200):
+    return {
+        'id': str(data_id),
+        'created_at': '2014-06-%02dT12:%02d:%02d.000000Z' % (data_id % 28 + 1, data_id % 60, data_id % 60),
+        'updated_at': '2014-06-%02dT13:%02d:%02d.000000Z' % (data_id % 28 + 1, data_id % 60, data_id % 60),
+        'folder': 'folder_%d' % (data_id % 5),
+        'state': rnd.choice(['Pending', 'Moderated', 'Rejected']),
+        'key': None,
+        'title': random_text(40, rnd),
+        'text': random_text(text_size, rnd),
+        'link': 'http://example.com/%d' % data_id,
+        'source_url': None,
+        'image': {'image_url': 'http://example.com/%d.png' % data_id, 'image_width': 640, 'image_height': 480},
+        'user': {'id': str(data_id % 50), 'name': 'user_%d' % (data_id % 50), 'nick': u'nick ż%d' % data_id,
+                 'avatar': None},
+        'parent_id': str(data_id - 1) if data_id % 3 else None,
+        'children': [{'id': str(data_id * 10 + i), 'title': random_text(20, rnd)} for i in range(data_id % 3)],
+        'additional': {'price': rnd.random() * 100, 'count': rnd.randint(0, 1000), 'tag': random_text(8, rnd)},
+    }
+
+
+def data_get_response(count=100, message_id='1', seed=1, text_size=200):
+    rnd = random.Random(seed)
+    return {'type': 'callresponse', 'message_id': message_id, 'result': 'OK',
+            'data': {'data': [data_object(i, rnd, text_size) for i in range(1, count + 1)]}}
+
+
+def data_new_call(message_id='1', seed=1):
+    rnd = random.Random(seed)
+    obj = data_object(1, rnd)
+    params = dict(project_id='1', collection_id='2', title=obj['title'], text=obj['text'], link=obj['link'],
+                  folder=obj['folder'], state='Pending', **obj['additional'])
+    return {'type': 'call', 'method': 'data.new', 'message_id': message_id, 'params': params}
+
+
+def notification(seed=1):
+    rnd = random.Random(seed)
+    return {'type': 'new', 'object': 'data', 'channel': {'project_id': '1', 'collection_id': '2'},
+            'data': data_object(rnd.randint(1, 10 ** 6), rnd)}
+
+
+def ping():
+    return {'type': 'ping', 'timestamp': '2014-06-01T12:00:00.000000Z'}
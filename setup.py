@@ -14,6 +14,6 @@ setup(name='syncano',
                    'Programming Language :: Python',
                    'Programming Language :: Python :: 2.7',
                    'Programming Language :: Python :: 3.3'],
-      install_requires=['gevent==1.0.1']
+      install_requires=[]
     )
 
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import logging
+
+from syncano.exceptions import ApiException, AuthException, ConnectionLost
+from syncano.callbacks import NOTIFICATION_TYPES, JsonCallback
+from syncano.codec import get_codec
+from syncano.telemetry import ConnectionTelemetry
+from syncano.client import (HOST, PORT, FrameDecoder, create_ssl_context, AdminMixin, ApikeyMixin, RoleMixin,
+                            ProjectMixin, CollectionMixin, FolderMixin, UserMixin, DataObjectMixin,
+                            NotificationMixin, SubscriptionMixin, ConnectionMixin)
+
+
+logger = logging.getLogger('syncano.aio')
+
+
+class SyncanoProtocol(asyncio.Protocol):
+
+    def __init__(self, instance, api_key, loop, callback_handler=JsonCallback, name="SYNCANO_AIO_CLIENT",
+                 codec=None, high_watermark=4194304, low_watermark=1048576, *args, **kwargs):
+        self.callback = callback_handler(self, *args, **kwargs) if callback_handler else None
+        self.instance = instance
+        self.api_key = api_key
+        self.name = name
+        self.codec = codec if hasattr(codec, 'loads') else get_codec(codec)
+        self.loop = loop
+        self.transport = None
+        self.authorized = None
+        self.auth_waiter = loop.create_future()
+        self.frames = FrameDecoder()
+        self.futures = {}
+        self.telemetry = ConnectionTelemetry()
+        self.notifications = asyncio.Queue()
+        self.closed = False
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.write_pauses = 0
+        self.drain_waiter = None
+
+    def write_to_buffer(self, data):
+        logger.info(u'%s - sent to server %s', self.name, data)
+        if data.get('message_id'):
+            self.telemetry.call_sent(data['message_id'])
+        self.transport.write(self.codec.dump_frame(data))
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.high_watermark is not None:
+            transport.set_write_buffer_limits(self.high_watermark, self.low_watermark)
+        self.write_to_buffer(dict(instance=self.instance, api_key=self.api_key))
+
+    def pause_writing(self):
+        self.write_pauses += 1
+        if self.drain_waiter is None:
+            self.drain_waiter = self.loop.create_future()
+
+    def resume_writing(self):
+        waiter, self.drain_waiter = self.drain_waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def drain(self):
+        if self.drain_waiter is not None:
+            await asyncio.shield(self.drain_waiter)
+        if self.closed:
+            raise ConnectionLost
+
+    def queue_stats(self):
+        return dict(bytes=self.transport.get_write_buffer_size() if self.transport else 0,
+                    high_watermark=self.high_watermark, low_watermark=self.low_watermark,
+                    paused=self.drain_waiter is not None, pauses=self.write_pauses)
+
+    def data_received(self, data):
+        loads = self.codec.loads
+        for frame in self.frames.feed(data):
+            self.handle_message(loads(frame))
+
+    def handle_message(self, received):
+        logger.info(u'%s - received from server %s', self.name, received)
+        if received.get('message_id') is not None:
+            self.telemetry.call_answered(received['message_id'])
+        future = self.futures.pop(received.get('message_id'), None)
+        if self.callback is None and self.authorized is None and received.get('type') in ('auth', 'error'):
+            self.authorized = received.get('result') == 'OK'
+        try:
+            res = self.callback.process_message(received) if self.callback else received
+        except ApiException as e:
+            if future is not None and not future.done():
+                future.set_exception(e)
+            else:
+                logger.error(u'%s - %s', self.name, e)
+            return
+        finally:
+            if self.authorized is not None and not self.auth_waiter.done():
+                self.auth_waiter.set_result(self.authorized)
+        if res is None:
+            return
+        if future is not None:
+            if not future.done():
+                future.set_result(res)
+        elif received.get('type') in NOTIFICATION_TYPES:
+            self.notifications.put_nowait(res)
+
+    def connection_lost(self, exc):
+        self.closed = True
+        self.telemetry.sent_at.clear()
+        if not self.auth_waiter.done():
+            self.auth_waiter.set_exception(ConnectionLost(exc or 'closed during authorization'))
+        futures, self.futures = self.futures, {}
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(ConnectionLost(exc or 'closed with call in progress'))
+        self.notifications.put_nowait(None)
+        self.resume_writing()
+
+
+class SyncanoAioApi(AdminMixin, ApikeyMixin, RoleMixin, ProjectMixin, CollectionMixin, FolderMixin,
+                    UserMixin, DataObjectMixin, NotificationMixin, SubscriptionMixin, ConnectionMixin):
+
+    def __init__(self, instance, api_key, host=None, port=None, secure=True, ssl_context=None, loop=None, **kwargs):
+        self.instance = instance
+        self.api_key = api_key
+        self.host = host or HOST
+        self.port = port or PORT
+        self.ssl_context = (ssl_context or create_ssl_context()) if secure else None
+        self.loop = loop
+        self.kwargs = kwargs
+        self.cli = None
+        self.message_ids = itertools.count(1)
+
+    async def connect(self, timeout=None):
+        self.loop = self.loop or asyncio.get_event_loop()
+        kwargs = dict(self.kwargs)
+        kwargs.setdefault('syncano', self)
+        _, self.cli = await self.loop.create_connection(
+            lambda: SyncanoProtocol(self.instance, self.api_key, self.loop, **kwargs),
+            self.host, self.port, ssl=self.ssl_context)
+        authorized = await asyncio.wait_for(asyncio.shield(self.cli.auth_waiter), timeout)
+        if not authorized:
+            self.close()
+            raise AuthException
+        return self
+
+    def api_call(self, **kwargs):
+        if self.cli is None or self.cli.closed:
+            raise ConnectionLost
+        data = {'type': 'call'}
+        data.update(kwargs)
+        if not data.get('message_id'):
+            data['message_id'] = str(next(self.message_ids))
+        future = self.loop.create_future()
+        self.cli.futures[data['message_id']] = future
+        self.cli.write_to_buffer(data)
+        return future
+
+    async def drain(self):
+        await self.cli.drain()
+
+    async def iter_data(self, project_id, collection_id=None, collection_key=None, page_size=100, order='ASC',
+                        **filters):
+        assert filters.get('order_by', 'created_at') == 'created_at', u"pages follow ids, order_by must be created_at"
+        cursor = 'since_id' if order.upper() == 'ASC' else 'max_id'
+        filters.update(limit=page_size, order=order, order_by='created_at')
+        future = self.data_get(project_id, collection_id, collection_key, **filters)
+        try:
+            while future is not None:
+                page = await future
+                items = page['data']['data'] if isinstance(page, dict) else list(page)
+                future = None
+                if len(items) >= page_size:
+                    filters[cursor] = items[-1].get('id')
+                    future = self.data_get(project_id, collection_id, collection_key, **filters)
+                for item in items:
+                    yield item
+        finally:
+            if future is not None:
+                future.cancel()
+
+    async def tail_notifications(self, since_id=None, since_time=None, page_size=100, **kwargs):
+        checkpoint = int(since_id) if since_id is not None else None
+        kwargs.update(since_id=since_id, since_time=since_time, limit=page_size, order='ASC')
+        while True:
+            history = (await self.notification_get_history(**kwargs))['data']['history']
+            for message in history:
+                checkpoint = int(message['id'])
+                yield message
+            if len(history) < page_size:
+                break
+            kwargs.update(since_id=checkpoint, since_time=None)
+        async for message in self.notifications():
+            if message.get('type') not in NOTIFICATION_TYPES:
+                continue
+            if message.get('id') is not None and checkpoint is not None:
+                if int(message['id']) <= checkpoint:
+                    continue
+                checkpoint = int(message['id'])
+            yield message
+
+    async def notifications(self):
+        while True:
+            message = await self.cli.notifications.get()
+            if message is None:
+                return
+            yield message
+
+    def close(self):
+        if self.cli is not None and self.cli.transport is not None:
+            self.cli.transport.close()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, type, value, traceback):
+        self.close()
@@ -0,0 +1,221 @@
+import collections
+import threading
+import time
+
+
+INVALIDATING_NAMESPACES = frozenset(['project', 'collection', 'folder', 'data', 'user'])
+
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def result_object(namespace, result):
+    if isinstance(result, dict):
+        return result.get('data', {}).get(namespace) or {}
+    return result
+
+
+def cache_formatter(cache, method, params, formatter=None):
+    epoch = cache.epoch
+
+    def format_result(result):
+        if formatter is not None:
+            result = formatter(result)
+        return cache.put(method, params, result, epoch)
+    return format_result
+
+
+def collection_refs(params):
+    return [str(params[name]) for name in ('collection_id', 'collection_key') if params.get(name)]
+
+
+class ResultCache(object):
+
+    def __init__(self, max_size=1024, ttl=60):
+        assert max_size > 0, u"max_size must be positive"
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.tagged = collections.defaultdict(set)
+        self.aliases = {}
+        self.invalidated = collections.OrderedDict()
+        self.epoch = 0
+        self.forgotten_epoch = 0
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    @staticmethod
+    def key(method, params):
+        return method, tuple(sorted((name, str(value)) for name, value in params.items()))
+
+    def get(self, method, params):
+        key = self.key(method, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if expires_at is not None and expires_at < time.time():
+                self.expirations += 1
+                self.misses += 1
+                self.discard(key)
+                return None
+            self.entries[key] = self.entries.pop(key)
+            self.hits += 1
+            return value
+
+    def put(self, method, params, result, epoch=None):
+        key = self.key(method, params)
+        tags = self.result_tags(method, params, result)
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            if epoch is not None and self.invalidated_since(epoch, tags):
+                self.stale_puts += 1
+                return result
+            self.discard(key)
+            self.entries[key] = (expires_at, result, tags)
+            for tag in tags:
+                self.tagged[tag].add(key)
+            while len(self.entries) > self.max_size:
+                self.evictions += 1
+                self.discard(next(iter(self.entries)))
+        return result
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self.tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tagged[tag]
+
+    def invalidated_since(self, epoch, tags):
+        if epoch < self.forgotten_epoch:
+            return True
+        return any(self.invalidated.get(tag, 0) > epoch for tag in tags)
+
+    def invalidate(self, *tags):
+        with self.lock:
+            self.epoch += 1
+            for tag in tags:
+                self.invalidated.pop(tag, None)
+                self.invalidated[tag] = self.epoch
+                for key in list(self.tagged.get(tag, ())):
+                    self.invalidations += 1
+                    self.discard(key)
+            while len(self.invalidated) > self.max_size:
+                self.forgotten_epoch = self.invalidated.popitem(last=False)[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tagged.clear()
+            self.invalidated.clear()
+            self.epoch += 1
+            self.forgotten_epoch = self.epoch
+
+    def stats(self):
+        return dict(size=len(self.entries), hits=self.hits, misses=self.misses, evictions=self.evictions,
+                    expirations=self.expirations, invalidations=self.invalidations, stale_puts=self.stale_puts)
+
+    def collection_tags(self, project_id, refs):
+        tags = []
+        for ref in refs:
+            tags.append(('in_collection', project_id, ref))
+            alias = self.aliases.get((project_id, ref))
+            if alias is not None:
+                tags.append(('in_collection', project_id, alias))
+        return tags
+
+    def result_tags(self, method, params, result):
+        project_id = str(params.get('project_id'))
+        namespace = method.split('.')[0]
+        obj = result_object(namespace, result)
+        if namespace == 'project':
+            return [('project', project_id), ('in_project', project_id)]
+        if namespace == 'user':
+            return [('user', str(obj.get(name))) for name in ('id', 'name') if obj.get(name) is not None]
+        tags = [('in_project', project_id)] + self.collection_tags(project_id, collection_refs(params))
+        if namespace == 'collection':
+            collection_id, key = str(obj.get('id')), obj.get('key')
+            tags.append(('collection', project_id, collection_id))
+            if key:
+                with self.lock:
+                    self.aliases[(project_id, collection_id)] = str(key)
+                    self.aliases[(project_id, str(key))] = collection_id
+                tags.append(('collection', project_id, str(key)))
+        elif namespace == 'data':
+            tags.extend(('data', project_id, str(obj.get(name))) for name in ('id', 'key') if obj.get(name))
+            user = obj.get('user')
+            if user:
+                tags.append(('user', str(user.get('id'))))
+        return tags
+
+    def invalidate_collection(self, project_id, refs):
+        tags = self.collection_tags(project_id, refs)
+        if len(tags) == len(refs):
+            tags.append(('in_project', project_id))
+        self.invalidate(*tags)
+
+    def invalidate_call(self, method, params):
+        project_id = str(params.get('project_id'))
+        namespace, action = method.split('.')
+        refs = collection_refs(params)
+        if namespace == 'project' and action in ('update', 'delete'):
+            self.invalidate(('project', project_id))
+            if action == 'delete':
+                self.invalidate(('in_project', project_id))
+        elif namespace == 'collection' and action not in ('new', 'get', 'get_one'):
+            self.invalidate(*[('collection', project_id, ref) for ref in refs])
+            if action == 'delete' or (action == 'update' and params.get('collection_key')):
+                self.invalidate_collection(project_id, refs)
+        elif namespace == 'folder' and action in ('update', 'delete'):
+            self.invalidate_collection(project_id, refs)
+        elif namespace == 'data':
+            if action == 'new' and params.get('parent_id'):
+                self.invalidate(('data', project_id, str(params['parent_id'])))
+            elif action == 'update' and not params.get('parent_id'):
+                self.invalidate(*[('data', project_id, str(params[name])) for name in ('data_id', 'data_key')
+                                  if params.get(name)])
+            elif action in ('move', 'delete') and params.get('data_ids'):
+                self.invalidate(*[('data', project_id, str(i)) for i in as_list(params['data_ids'])])
+            elif action not in ('new', 'get', 'get_one', 'count', 'copy'):
+                self.invalidate_collection(project_id, refs)
+        elif namespace == 'user' and action in ('update', 'delete'):
+            self.invalidate(*[('user', str(params[name])) for name in ('user_id', 'user_name') if params.get(name)])
+
+    def invalidate_notification(self, message):
+        target = message.get('target') or message.get('channel') or {}
+        data = message.get('data') or {}
+        project_id = str(target.get('project_id'))
+        refs = [str(target['collection_id'])] if target.get('collection_id') else []
+        ids = as_list(target.get('id')) or as_list(data.get('id'))
+        kind = message.get('object', 'data')
+        if kind == 'data':
+            if message.get('type') == 'new':
+                ids = []
+            if data.get('parent_id'):
+                ids.append(data['parent_id'])
+            self.invalidate(*[('data', project_id, str(i)) for i in ids])
+        elif kind == 'collection':
+            self.invalidate(*[('collection', project_id, str(i)) for i in ids or refs])
+            if message.get('type') == 'delete':
+                self.invalidate_collection(project_id, [str(i) for i in ids] or refs)
+        elif kind == 'project':
+            self.invalidate(*[('project', str(i)) for i in ids or [project_id]])
+            if message.get('type') == 'delete':
+                self.invalidate(*[('in_project', str(i)) for i in ids or [project_id]])
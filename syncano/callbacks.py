@@ -10,6 +10,8 @@ from syncano.exceptions import ApiException
 
 logger = logging.getLogger('syncano.callbacks')
 
+NOTIFICATION_TYPES = ('new', 'change', 'delete', 'message')
+
 
 class JsonCallback(object):
 
@@ -23,7 +25,7 @@ class JsonCallback(object):
         message_type = received.get('type', 'error')
         if not self.owner.authorized and message_type == 'error':
             message_type='auth'
-        if message_type in ('new', 'change', 'delete', 'message') :
+        if message_type in NOTIFICATION_TYPES:
             res = self.process_notification(received)
         else:
             res = getattr(self, 'process_' + message_type)(received)
@@ -33,6 +35,9 @@ class JsonCallback(object):
 
     def process_ping(self, received):
         self.owner.last_ping = received['timestamp']
+        telemetry = getattr(self.owner, 'telemetry', None)
+        if telemetry is not None:
+            telemetry.ping_received(received)
         return received
 
     def process_auth(self, received):
@@ -56,30 +61,91 @@ class JsonCallback(object):
         return received
 
 
+MAX_LAYOUTS = 1024
+
+layouts = {}
+
+
+class FieldLayout(object):
+
+    __slots__ = ('names', 'index', 'extended')
+
+    def __init__(self, names):
+        self.names = names
+        self.index = dict((name, i) for i, name in enumerate(names))
+        self.extended = {}
+
+    def add(self, name):
+        layout = self.extended.get(name)
+        if layout is None:
+            layout = self.extended[name] = get_layout(self.names + (name,))
+        return layout
+
+
+def get_layout(names):
+    layout = layouts.get(names)
+    if layout is None:
+        layout = FieldLayout(names)
+        if len(layouts) < MAX_LAYOUTS:
+            layouts[names] = layout
+    return layout
+
+
 class BaseResultObject(object):
 
+    __slots__ = ('conn', 'message_id', '_layout', '_values')
+
     TAG = None
 
     def __init__(self, syncano_connection, result_object_dict, message_id=None):
-            self.conn = syncano_connection
-            self.message_id = message_id
-            for key in result_object_dict:
-                if isinstance(result_object_dict[key], dict):
-                    setattr(self, key, BaseResultObject(None, result_object_dict[key]))
-                elif isinstance(result_object_dict[key], list):
-                    r = result_object_dict[key]
-                    temp = [BaseResultObject(None, x) if isinstance(x, dict) else x for x in r]
-                    setattr(self, key, temp)
-                else:
-                    setattr(self, key, result_object_dict[key])
+        object.__setattr__(self, 'conn', syncano_connection)
+        object.__setattr__(self, 'message_id', message_id)
+        object.__setattr__(self, '_layout', get_layout(tuple(result_object_dict)))
+        object.__setattr__(self, '_values', list(result_object_dict.values()))
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in BaseResultObject.__slots__:
+            raise AttributeError(name)
+        try:
+            index = self._layout.index[name]
+        except KeyError:
+            raise AttributeError(name)
+        value = self._values[index]
+        if isinstance(value, dict):
+            value = self._values[index] = BaseResultObject(None, value)
+        elif isinstance(value, list) and any(isinstance(x, dict) for x in value):
+            value = self._values[index] = [BaseResultObject(None, x) if isinstance(x, dict) else x for x in value]
+        return value
+
+    def __setattr__(self, name, value):
+        if name in BaseResultObject.__slots__:
+            object.__setattr__(self, name, value)
+            return
+        index = self._layout.index.get(name)
+        if index is None:
+            object.__setattr__(self, '_layout', self._layout.add(name))
+            self._values.append(value)
+        else:
+            self._values[index] = value
+
+    def __delattr__(self, name):
+        index = self._layout.index.get(name)
+        if index is None:
+            raise AttributeError(name)
+        names = self._layout.names
+        object.__setattr__(self, '_layout', get_layout(names[:index] + names[index + 1:]))
+        del self._values[index]
+
+    def __dir__(self):
+        return sorted(set(dir(type(self))) | set(('conn', 'message_id')) | set(self._layout.names))
+
+    def as_dict(self):
+        return dict(zip(self._layout.names, self._values))
 
     def update_attrs(self, **kwargs):
         for k in kwargs:
             if kwargs[k]:
-                if isinstance(kwargs[k], dict):
-                    setattr(self, k, BaseResultObject(None, kwargs[k]))
-                else:
-                    setattr(self, k, kwargs[k])
+                setattr(self, k, kwargs[k])
 
     def get(self, key, default=None):
         return getattr(self, key, default)
@@ -112,6 +178,8 @@ def check_attributes_decorator(*fields_list):
 
 class AdminObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'admin'
 
     def delete(self):
@@ -124,6 +192,8 @@ class AdminObject(BaseResultObject):
 
 class ApikeyObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'apikey'
 
     def delete(self):
@@ -135,10 +205,14 @@ class ApikeyObject(BaseResultObject):
 
 class RoleObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'role'
 
 class ProjectObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'project'
 
     def delete(self):
@@ -151,6 +225,8 @@ class ProjectObject(BaseResultObject):
 
 class ConnectionObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'connection'
 
     def update(self, state=None, name=None):
@@ -160,6 +236,8 @@ class ConnectionObject(BaseResultObject):
 
 class CollectionObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'collection'
 
     @check_attributes_decorator('project_id', 'id')
@@ -203,6 +281,8 @@ class CollectionObject(BaseResultObject):
 
 class FolderObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'folder'
 
     @check_attributes_decorator('project_id', ['collection_id', 'collection_key'], 'name')
@@ -220,6 +300,8 @@ class FolderObject(BaseResultObject):
 
 class DataObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'data'
 
     @check_attributes_decorator('project_id', ['collection_id', 'collection_key'], 'id')
@@ -250,11 +332,13 @@ class DataObject(BaseResultObject):
                                     data_key=getattr(self, 'key', None), user_name=user_name, source_url=source_url,
                                     title=title, text=text, link=link, image=image, image_url=image_url,
                                     folder=folder, state=state, parent_id=parent_id)
-        self.__init__(self.conn, res.__dict__)
+        self.__init__(self.conn, res.as_dict(), res.message_id)
 
 
 class UserObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'user'
 
     def update(self, user_name=None, nick=None, avatar=None):
@@ -267,6 +351,8 @@ class UserObject(BaseResultObject):
 
 class SubscriptionObject(BaseResultObject):
 
+    __slots__ = ()
+
     TAG = 'subscription'
 
     def unsubscribe_project(self):
@@ -280,9 +366,25 @@ class SubscriptionObject(BaseResultObject):
 
 class ObjectIterResult(object):
 
-    def __init__(self, items, message_id=None):
-        self.items = items
+    scope_fields = ('project_id', 'collection_id', 'collection_key')
+
+    def __init__(self, items, message_id=None, cls=None, syncano=None):
         self.message_id = message_id
+        self.cls = cls
+        self.syncano = syncano
+        self.rows = list(items) if cls is not None else None
+        self.objects = [None] * len(items) if cls is not None else list(items)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self.scope_fields:
+            for obj in self.objects:
+                if obj is not None:
+                    self.set_if_not_exist(obj, name)
+
+    @property
+    def items(self):
+        return list(self)
 
     def get(self, key, default):
         return getattr(self, key, default)
@@ -292,17 +394,31 @@ class ObjectIterResult(object):
         if not getattr(obj, key, False):
             setattr(obj, key, obj_iter_value)
 
+    def build(self, index):
+        obj = self.objects[index]
+        if obj is None:
+            obj = self.cls(self.syncano, self.rows[index], self.message_id)
+            for k in self.scope_fields:
+                self.set_if_not_exist(obj, k)
+            self.objects[index] = obj
+            self.rows[index] = None
+        return obj
+
     def __iter__(self):
-        for i in self.items:
-            for k in ('project_id', 'collection_id', 'collection_key'):
-                self.set_if_not_exist(i, k)
-            yield i
+        for i in range(len(self.objects)):
+            yield self.build(i)
 
     def __len__(self):
-        return len(self.items)
+        return len(self.objects)
 
     def __getitem__(self, index):
-        return self.items[index]
+        if isinstance(index, slice):
+            return [self.build(i) for i in range(*index.indices(len(self.objects)))]
+        if index < 0:
+            index += len(self.objects)
+        if not 0 <= index < len(self.objects):
+            raise IndexError(index)
+        return self.build(index)
 
 
 class ObjectCallback(JsonCallback):
@@ -323,7 +439,7 @@ class ObjectCallback(JsonCallback):
             if cls.TAG:
                 result = received['data'][cls.TAG]
                 if isinstance(result, list):
-                    return ObjectIterResult([cls(self.syncano, r, message_id) for r in result], message_id)
+                    return ObjectIterResult(result, message_id, cls, self.syncano)
                 else:
                     return cls(self.syncano, result, message_id)
             else:
@@ -1,708 +1,723 @@
 import asyncore
+import codecs
+import collections
+import errno
+import itertools
+import functools
+import heapq
 import socket
-import gevent.ssl
+import threading
 import ssl
 import time
-import json
 import logging
+import random
+import sys
+import weakref
 
-from syncano.exceptions import AuthException, ConnectionLost
-from syncano.callbacks import JsonCallback, ObjectCallback
+from syncano.exceptions import ApiException, AuthException, ConnectionLost, TimeoutException
+from syncano.callbacks import NOTIFICATION_TYPES, JsonCallback, ObjectCallback
+from syncano.codec import get_codec
+from syncano.schema import API_SCHEMA, ANNOTATED_FIELDS, annotate_result, compile_async_method, compile_sync_method
+from syncano.telemetry import ConnectionTelemetry
 
 
 HOST = 'api.syncano.com'
 PORT = 8200
+IOV_MAX = 1024
+TLS_SESSIONS = weakref.WeakKeyDictionary()
+IDEMPOTENT_METHODS = frozenset(spec.method for spec in API_SCHEMA if spec.idempotent)
+API_NAMESPACES = ('admin', 'apikey', 'role', 'connection', 'folder', 'project', 'collection',
+                  'data', 'notification', 'subscription', 'user')
 
 logger = logging.getLogger('syncano.client')
 
 
+def create_ssl_context():
+    context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_CLIENT', ssl.PROTOCOL_SSLv23))
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class FrameDecoder(object):
+
+    def __init__(self, delimiter=u'\n', encoding='utf-8'):
+        self.delimiter = delimiter
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.pending = []
+
+    def feed(self, data):
+        text = self.decoder.decode(data)
+        frames = []
+        start = 0
+        end = text.find(self.delimiter)
+        while end != -1:
+            frame = text[start:end]
+            if self.pending:
+                self.pending.append(frame)
+                frame = u''.join(self.pending)
+                self.pending = []
+            if frame.strip():
+                frames.append(frame)
+            start = end + len(self.delimiter)
+            end = text.find(self.delimiter, start)
+        if start < len(text):
+            self.pending.append(text[start:])
+        return frames
+
+    def reset(self):
+        self.decoder.reset()
+        self.pending = []
+
+
+class SyncanoFuture(object):
+
+    def __init__(self, api, message_id, formatter=None):
+        self.api = api
+        self.message_id = message_id
+        self.formatter = formatter
+        self.finished = False
+        self.cancelled = False
+        self.value = None
+        self.error = None
+        self.callbacks = []
+
+    def set_result(self, result):
+        if self.formatter:
+            try:
+                result = self.formatter(result)
+            except Exception as e:
+                return self.set_exception(e)
+        self.value = result
+        self.finish()
+
+    def set_exception(self, error):
+        self.error = error
+        self.finish()
+
+    def finish(self):
+        self.finished = True
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        if self.finished:
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+    def cancel(self):
+        if self.finished:
+            return False
+        self.cancelled = True
+        cli = getattr(self.api, 'cli', None)
+        if cli is not None:
+            cli.telemetry.call_failed(self.message_id)
+        self.set_exception(ConnectionLost('call cancelled'))
+        return True
+
+    def done(self):
+        return self.finished
+
+    def exception(self, timeout=None):
+        self.api.wait(self, timeout)
+        return self.error
+
+    def result(self, timeout=None):
+        self.api.wait(self, timeout)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class BulkReport(object):
+
+    def __init__(self):
+        self.results = []
+        self.errors = 0
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def add(self, future):
+        error = future.exception()
+        if error is not None:
+            self.errors += 1
+            self.results.append(error)
+        else:
+            self.results.append(future.value)
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    @property
+    def count(self):
+        return len(self.results)
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed else 0.0
+
+
 class SyncanoClient(asyncore.dispatcher):
 
+    read_size = 65536
+
+    ssl_batch_size = 65536
+
+    ssl_context = None
+
+    idempotent_methods = IDEMPOTENT_METHODS
+
     def __init__(self, instance, api_key, host=None, port=None, callback_handler=JsonCallback,
-                 name="SYNCANO_CLIENT", *args, **kwargs):
+                 name="SYNCANO_CLIENT", secure=True, ssl_context=None, reconnect=False, reconnect_delay=0.5,
+                 max_reconnect_delay=30, max_reconnect_attempts=None, codec=None, high_watermark=4194304,
+                 low_watermark=1048576, listeners=None, *args, **kwargs):
 
-        asyncore.dispatcher.__init__(self)
+        self.map = {}
+        asyncore.dispatcher.__init__(self, map=self.map)
         self.callback = callback_handler(self, *args, **kwargs) if callback_handler else None
         self.instance = instance
         self.api_key = api_key
         self.name = name
-        self.buffer = ''.encode('utf-8')
-        self.results = []
+        self.codec = codec if hasattr(codec, 'loads') else get_codec(codec)
+        self.frames_out = collections.deque()
+        self.frame_ids = collections.deque()
+        self.frame_offset = 0
+        self.pending_bytes = 0
+        self.ssl_retry_size = None
+        assert high_watermark is None or 0 <= low_watermark <= high_watermark, u"low_watermark above high_watermark"
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.write_pauses = 0
+        self.listeners = listeners if listeners is not None else []
+        self.results = collections.deque()
+        self.responses = collections.OrderedDict()
+        self.futures = {}
+        self.message_ids = itertools.count(1)
+        self.telemetry = ConnectionTelemetry()
+        self.address = (host or HOST, port or PORT)
+        self.secure = secure
+        if ssl_context is not None:
+            self.ssl_context = ssl_context
+        elif SyncanoClient.ssl_context is None:
+            SyncanoClient.ssl_context = create_ssl_context()
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.reconnect_attempts = 0
+        self.reconnect_at = None
+        self.reconnecting = False
+        self.sent_calls = collections.OrderedDict()
+        self.subscriptions = collections.OrderedDict()
+        self.internal_ids = set()
+        self.handshaking = False
+        self.handshake_wants_write = False
+        self.authorized = None
+        self.frames = FrameDecoder()
         self.prepare_auth()
         self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.connect((host or HOST, port or PORT))
-        self.authorized = None
-        self.temp_received = ''
+        self.connect(self.address)
 
     def write_to_buffer(self, data):
-        data = json.dumps(data) + '\n'
-        self.buffer = self.buffer + data.encode('utf-8')
+        logger.info(u'%s - sent to server %s', self.name, data)
+        frame = self.codec.dump_frame(data)
+        message_id = data.get('message_id') if data.get('type') == 'call' else None
+        if message_id and self.reconnect:
+            self.sent_calls[message_id] = data
+        self.frames_out.append(memoryview(frame))
+        self.frame_ids.append(message_id)
+        self.pending_bytes += len(frame)
 
     def clean_buffer(self, offset):
-        self.buffer = self.buffer[offset:]
+        self.pending_bytes -= offset
+        offset += self.frame_offset
+        while self.frames_out and offset >= len(self.frames_out[0]):
+            offset -= len(self.frames_out.popleft())
+            message_id = self.frame_ids.popleft()
+            if message_id:
+                self.telemetry.call_sent(message_id)
+        self.frame_offset = offset
+
+    def ssl_batch(self):
+        frames = self.frames_out
+        head = frames[0][self.frame_offset:]
+        limit = self.ssl_retry_size or self.ssl_batch_size
+        size = len(head)
+        count = 1
+        for frame in itertools.islice(frames, 1, None):
+            if size + len(frame) > limit:
+                break
+            size += len(frame)
+            count += 1
+        if count == 1:
+            return head
+        batch = bytearray(size)
+        batch[:len(head)] = head
+        offset = len(head)
+        for frame in itertools.islice(frames, 1, count):
+            batch[offset:offset + len(frame)] = frame
+            offset += len(frame)
+        return batch
+
+    def send_frames(self):
+        frames = self.frames_out
+        if self.secure:
+            batch = self.ssl_batch()
+            try:
+                sent = self.send(batch)
+            except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                self.ssl_retry_size = len(batch)
+                return 0, len(batch)
+            self.ssl_retry_size = None
+            return sent, len(batch)
+        head = frames[0][self.frame_offset:]
+        sendmsg = getattr(self.socket, 'sendmsg', None)
+        if len(frames) == 1 or sendmsg is None:
+            return self.send(head), len(head)
+        buffers = [head]
+        buffers.extend(itertools.islice(frames, 1, IOV_MAX))
+        try:
+            return sendmsg(buffers), sum(len(b) for b in buffers)
+        except socket.error as why:
+            if why.args[0] in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return 0, 1
+            elif why.args[0] in asyncore._DISCONNECTED:
+                self.handle_close()
+                return 0, 1
+            raise
+
+    def over_high_watermark(self):
+        return self.high_watermark is not None and self.pending_bytes >= self.high_watermark
+
+    def queue_stats(self):
+        return dict(frames=len(self.frames_out), bytes=self.pending_bytes, high_watermark=self.high_watermark,
+                    low_watermark=self.low_watermark, pauses=self.write_pauses)
 
     def prepare_auth(self):
         auth = dict(instance=self.instance, api_key=self.api_key)
         self.write_to_buffer(auth)
 
     def handle_connect(self):
-        self.socket = gevent.ssl.wrap_socket(self.socket, do_handshake_on_connect=False)
-        while True:
-            try:
-                self.socket.do_handshake()
-            except ssl.SSLError as err:
-                continue
-            else:
-                break
+        if not self.secure:
+            return
+        session = TLS_SESSIONS.get(self.ssl_context, {}).get(self.address)
+        self.socket = self.ssl_context.wrap_socket(self.socket, do_handshake_on_connect=False, session=session)
+        self.handshaking = True
+        self.do_handshake()
+
+    def do_handshake(self):
+        try:
+            self.socket.do_handshake()
+        except ssl.SSLWantReadError:
+            self.handshake_wants_write = False
+        except ssl.SSLWantWriteError:
+            self.handshake_wants_write = True
+        else:
+            self.handshaking = False
+            self.store_session()
+
+    def store_session(self):
+        if self.handshaking:
+            return
+        session = getattr(self.socket, 'session', None)
+        if session is not None:
+            TLS_SESSIONS.setdefault(self.socket.context, {})[self.address] = session
 
     def handle_close(self):
+        if self.reconnect_at is not None:
+            return
+        self.store_session()
         self.close()
+        attempts_left = self.max_reconnect_attempts is None or self.reconnect_attempts < self.max_reconnect_attempts
+        if self.reconnect and attempts_left:
+            delay = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** self.reconnect_attempts)
+            self.reconnect_at = time.time() + random.uniform(0, delay)
+            self.reconnect_attempts += 1
+            logger.info(u'%s - connection lost, reconnecting in %.2fs', self.name, self.reconnect_at - time.time())
+            return
+        self.reconnect_at = None
+        self.sent_calls.clear()
+        self.telemetry.sent_at.clear()
+        futures, self.futures = self.futures, {}
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(ConnectionLost('closed with call in progress'))
+
+    def disconnect(self):
+        self.reconnect = False
+        self.handle_close()
+
+    def reopen(self):
+        unsent = set(itertools.islice(self.frame_ids, 1 if self.frame_offset else 0, None))
+        self.frames_out.clear()
+        self.frame_ids.clear()
+        self.frame_offset = 0
+        self.pending_bytes = 0
+        self.ssl_retry_size = None
+        self.frames.reset()
+        self.reconnect_at = None
+        self.reconnecting = True
+        self.handshaking = False
+        self.authorized = None
+        calls, self.sent_calls = self.sent_calls, collections.OrderedDict()
+        self.prepare_auth()
+        for params in self.subscriptions.values():
+            message_id = self.next_message_id()
+            self.internal_ids.add(message_id)
+            self.write_to_buffer(dict(params, message_id=message_id))
+        for message_id, data in calls.items():
+            future = self.futures.get(message_id)
+            if future is not None and future.done():
+                self.futures.pop(message_id)
+            elif message_id in unsent or data.get('method') in self.idempotent_methods:
+                self.write_to_buffer(data)
+                continue
+            elif future is not None:
+                self.futures.pop(message_id)
+                future.set_exception(ConnectionLost('call may not have been completed'))
+            else:
+                self.responses[message_id] = ConnectionLost('call may not have been completed')
+            self.telemetry.call_failed(message_id)
+        try:
+            self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.connect(self.address)
+        except socket.error:
+            self.handle_close()
+
+    def poll(self, timeout):
+        if self.map:
+            asyncore.loop(timeout=timeout, count=1, map=self.map)
+            return True
+        if self.reconnect_at is None:
+            return False
+        delay = self.reconnect_at - time.time()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+        else:
+            self.reopen()
+        return True
+
+    def track_call(self, message_id, received):
+        data = self.sent_calls.pop(message_id, None)
+        if data is None or received.get('result') != 'OK':
+            return
+        method = data.get('method', '')
+        if method.startswith('subscription.subscribe_'):
+            key = method.replace('.subscribe_', '.') + repr(sorted(data['params'].items()))
+            self.subscriptions[key] = dict(type='call', method=method, params=data['params'])
+        elif method.startswith('subscription.unsubscribe_'):
+            key = method.replace('.unsubscribe_', '.') + repr(sorted(data['params'].items()))
+            self.subscriptions.pop(key, None)
 
     def handle_read(self):
-        last_received = self.recv(4048)
-        received = '' + last_received
-        while len(last_received) == 4048:
-            last_received = self.recv(4048)
-            received = received + last_received
-        received = received.decode('utf-8')
+        if self.handshaking:
+            return self.do_handshake()
         try:
-            self.temp_received = self.temp_received + received
-            received = json.loads(self.temp_received)
-            self.temp_received = ''
-        except ValueError:
+            self.feed(self.recv(self.read_size))
+            pending = getattr(self.socket, 'pending', None)
+            while pending and pending():
+                self.feed(self.recv(self.read_size))
+        except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
             return
 
+    def feed(self, data):
+        loads = self.codec.loads
+        for frame in self.frames.feed(data):
+            self.handle_message(loads(frame))
+
+    def handle_message(self, received):
         logger.info(u'%s - received from server %s', self.name, received)
+        message_id = received.get('message_id')
+        if message_id is not None:
+            self.telemetry.call_answered(message_id)
+        if self.reconnect:
+            if self.reconnecting and received.get('type') in ('auth', 'error'):
+                return self.handle_reconnect_auth(received)
+            if message_id is not None:
+                self.track_call(message_id, received)
+                if message_id in self.internal_ids:
+                    self.internal_ids.discard(message_id)
+                    if received.get('result') != 'OK':
+                        logger.warning(u'%s - resubscription failed %s', self.name, received)
+                    return
+        if message_id is None and self.listeners and received.get('type') in NOTIFICATION_TYPES:
+            if any([listener(received) for listener in self.listeners]):
+                return
+        future = self.futures.pop(message_id, None)
+        auth = received.get('type') == 'auth' or (received.get('type') == 'error' and not self.authorized)
+        try:
+            res = self.callback.process_message(received) if self.callback else received
+        except ApiException as e:
+            if future is None:
+                raise
+            if not future.done():
+                future.set_exception(e)
+            return
+        if auth:
+            if not self.callback:
+                self.authorized = received.get('result') == 'OK'
+            return
+        if future is not None:
+            if not future.done():
+                future.set_result(res)
+            return
+        if res is None:
+            return
+        if message_id is None:
+            self.results.append(res)
+        else:
+            if message_id in self.responses:
+                self.results.append(self.responses.pop(message_id))
+            self.responses[message_id] = res
+
+    def handle_reconnect_auth(self, received):
+        self.reconnecting = False
         if self.callback:
-            res = self.callback.process_message(received)
-            if res is not None:
-                self.results.append(res)
+            self.callback.process_auth(received)
         else:
-            self.results.append(received)
+            self.authorized = received.get('result') == 'OK'
+        if self.authorized:
+            self.reconnect_attempts = 0
+            logger.info(u'%s - reconnected', self.name)
+        else:
+            logger.error(u'%s - authorization failed after reconnect', self.name)
+            self.disconnect()
+
+    def next_message_id(self):
+        message_id = str(next(self.message_ids))
+        while message_id in self.futures:
+            message_id = str(next(self.message_ids))
+        return message_id
+
+    def pop_result(self, message_id=None):
+        if message_id:
+            return self.responses.pop(message_id, None)
+        if self.results:
+            return self.results.popleft()
+        if self.responses:
+            return self.responses.popitem(last=False)[1]
 
     def writable(self):
-        return self.buffer
+        if self.handshaking:
+            return self.handshake_wants_write
+        return bool(self.frames_out)
 
     def readable(self):
         return True
 
     def handle_write(self):
-        logger.info(u'%s - sent to server %s', self.name, self.buffer)
-        sent = self.send(self.buffer)
-        self.clean_buffer(sent)
+        if self.handshaking:
+            return self.do_handshake()
+        while self.frames_out:
+            sent, offered = self.send_frames()
+            self.clean_buffer(sent)
+            if sent < offered:
+                break
 
     def handle_error(self):
+        if self.reconnect and isinstance(sys.exc_info()[1], socket.error):
+            logger.warning(u'%s - connection error %s', self.name, sys.exc_info()[1])
+            return self.handle_close()
         raise
 
 
-class BaseMixin(object):
+class ApiNamespace(object):
 
-    @staticmethod
-    def get_standard_params(method, message_id):
-        attrs=dict(method=method, params=dict())
-        if message_id:
-            attrs['message_id'] = message_id
-        return attrs
+    def __init__(self, api, name):
+        self.api = api
+        self.prefix = name + '_'
 
-    def standard_method(self, method, message_id):
-        attrs = self.get_standard_params(method, message_id)
-        self.api_call(**attrs)
+    def __getattr__(self, item):
+        attr = getattr(self.api, self.prefix + item)
+        setattr(self, item, attr)
+        return attr
 
-    def update_params(self, attrs, name, value):
-        if value:
-            attrs['params'][name] = value
 
+class NamespaceProperty(object):
 
-class AdminMixin(BaseMixin):
+    def __init__(self, name):
+        self.name = name
 
-    def admin_new(self, admin_email, role_id, message, message_id=None):
-        attrs = self.get_standard_params('admin.new', message_id)
-        attrs['params']['admin_email'] = admin_email
-        attrs['params']['role_id'] = role_id
-        attrs['params']['message'] = message
-        self.api_call(**attrs)
-
-    def admin_get(self, message_id=None):
-        self.standard_method('admin.get', message_id)
-
-    def admin_get_one(self, admin_id=None, admin_email=None, message_id=None):
-        assert admin_id or admin_email, u"admin_id or admin_email_required"
-        attrs = self.get_standard_params('admin.get_one', message_id)
-        self.update_params(attrs, 'admin_id', admin_id)
-        self.update_params(attrs, 'admin_email', admin_email)
-        self.api_call(**attrs)
-
-    def admin_update(self, admin_id=None, admin_email=None, role_id=None, message_id=None):
-        assert admin_id or admin_email, u"admin_id or admin_email_required"
-        assert role_id, u"admin_role required"
-        attrs = self.get_standard_params('admin.update', message_id)
-        self.update_params(attrs, 'admin_id', admin_id)
-        self.update_params(attrs, 'admin_email', admin_email)
-        self.update_params(attrs, 'role_id', role_id)
-        self.api_call(**attrs)
-
-    def admin_delete(self, admin_id=None, admin_email=None, message_id=None):
-        assert admin_id or admin_email, u"admin_id or admin_email_required"
-        attrs = self.get_standard_params('admin.delete', message_id)
-        self.update_params(attrs, 'admin_id', admin_id)
-        self.update_params(attrs, 'admin_email', admin_email)
-        self.api_call(**attrs)
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        namespace = ApiNamespace(instance, self.name)
+        instance.__dict__[self.name] = namespace
+        return namespace
 
 
-class ApikeyMixin(BaseMixin):
+class BaseMixin(object):
+
+    cache = None
 
-    def apikey_new(self, role_id, description, message_id=None):
-        attrs = self.get_standard_params('apikey.new', message_id)
-        attrs['params']['role_id'] = role_id
-        attrs['params']['description'] = description
-        self.api_call(**attrs)
 
-    def apikey_get(self, message_id=None):
-        self.standard_method('apikey.get', message_id)
+class AdminMixin(BaseMixin):
 
-    def apikey_get_one(self, api_client_id=None, message_id=None):
-        attrs = self.get_standard_params('apikey.get_one', message_id)
-        self.update_params(attrs, 'api_client_id', api_client_id)
-        self.api_call(**attrs)
+    admin = NamespaceProperty('admin')
 
-    def apikey_update_description(self, api_client_id=None, description=None, message_id=None):
-        assert description is not None, "decription is required"
-        attrs = self.get_standard_params('apikey.update_description', message_id)
-        attrs['params']['description'] = description
-        attrs['params']['api_client_id'] = api_client_id
-        self.api_call(**attrs)
 
-    def apikey_delete(self, api_client_id, message_id=None):
-        attrs = self.get_standard_params('apikey.delete', message_id)
-        attrs['params']['api_client_id'] = api_client_id
-        self.api_call(**attrs)
+class ApikeyMixin(BaseMixin):
+
+    apikey = NamespaceProperty('apikey')
 
 
 class RoleMixin(BaseMixin):
 
-    def role_get(self, message_id):
-        self.standard_method('role.get', message_id)
+    role = NamespaceProperty('role')
 
 
 class ConnectionMixin(BaseMixin):
 
-    def connection_get(self, api_client_id=None, name=None, since_id=None, limit=None, message_id=None):
-        attrs = self.get_standard_params('connection.get', message_id)
-        self.update_params(attrs, 'api_client_id', api_client_id)
-        self.update_params(attrs, 'name', name)
-        self.update_params(attrs, 'since_id', since_id)
-        self.update_params(attrs, 'limit', limit)
-        self.api_call(**attrs)
-
-    def connection_update(self, uuid, state=None, name=None, api_client_id=None, message_id=None):
-        attrs = self.get_standard_params('connection.update', message_id)
-        attrs['params']['uuid'] = uuid
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'name', name)
-        self.update_params(attrs, 'api_client_id', api_client_id)
-        self.api_call(**attrs)
+    connection = NamespaceProperty('connection')
 
 
 class ProjectMixin(BaseMixin):
 
-    def project_new(self, name, message_id=None):
-        attrs = self.get_standard_params('project.new', message_id)
-        attrs['params']['name'] = name
-        self.api_call(**attrs)
-
-    def project_get(self, message_id=None):
-        self.standard_method('project.get', message_id)
-
-    def project_get_one(self, project_id, message_id=None):
-        attrs = self.get_standard_params('project.get_one', message_id)
-        attrs['params']['project_id'] = project_id
-        self.api_call(**attrs)
-
-    def project_update(self, project_id, name, message_id=None):
-        attrs = self.get_standard_params('project.update', message_id)
-        attrs['params']['name'] = name
-        attrs['params']['project_id'] = project_id
-        self.api_call(**attrs)
-
-    def project_delete(self, project_id, message_id=None):
-        attrs = self.get_standard_params('project.delete', message_id)
-        attrs['params']['project_id'] = project_id
-        self.api_call(**attrs)
+    project = NamespaceProperty('project')
 
 
 class CollectionMixin(BaseMixin):
 
-    def collection_new(self, project_id, name, key, message_id=None):
-        attrs = self.get_standard_params('collection.new', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['name'] = name
-        attrs['params']['key'] = key
-        self.api_call(**attrs)
-
-    def collection_get(self, project_id, status='all', with_tags=None, message_id=None):
-        attrs = self.get_standard_params('collection.get', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'status', status)
-        self.update_params(attrs, 'with_tags', with_tags)
-        self.api_call(**attrs)
-
-    def collection_get_one(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('collection.get_one', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def collection_activate(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('collection.activate', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def collection_deactivate(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('collection.deactivate', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def collection_update(self, project_id, collection_id, name=None, collection_key=None, message_id=None):
-        attrs = self.get_standard_params('collection.update', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['collection_id'] = collection_id
-        self.update_params(attrs, 'name', name)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def collection_delete(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('collection.delete', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def collection_add_tag(self, project_id, collection_id=None, collection_key=None,
-                           tags=[], weight=1, remove_other=False, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('collection.add_tag', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'tags', tags)
-        self.update_params(attrs, 'weight', weight)
-        self.update_params(attrs, 'remove_other', remove_other)
-        self.api_call(**attrs)
-
-    def collection_delete_tag(self, project_id, collection_id=None, collection_key=None, tags=[], message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('collection.delete_tag', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'tags', tags)
-        self.api_call(**attrs)
+    collection = NamespaceProperty('collection')
 
 
 class FolderMixin(BaseMixin):
 
-    def folder_new(self, project_id, name, collection_id=None, collection_key=None, source_id=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('folder.new', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['name'] = name
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'source_id', source_id)
-        self.api_call(**attrs)
-
-    def folder_get(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('folder.get', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def folder_get_one(self, project_id, folder_name, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('folder.get_one', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['folder_name'] = folder_name
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def folder_update(self, project_id, name, collection_id=None, collection_key=None,
-                      new_name=None, source_id=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('folder.update', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['name'] = name
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'new_name', new_name)
-        self.update_params(attrs, 'source_id', source_id)
-        self.api_call(**attrs)
-
-    def folder_delete(self, project_id, name, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('folder.delete', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['name'] = name
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
+    folder = NamespaceProperty('folder')
 
 
 class DataObjectMixin(BaseMixin):
 
-    def data_new(self, project_id, collection_id=None, collection_key=None,
-                 user_name=None, source_url=None, title=None, text=None, link=None, image=None,
-                 image_url=None, folder=None, state='Pending', data_key=None,
-                 parent_id=None, message_id=None, **kwargs):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.new', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'user_name', user_name)
-        self.update_params(attrs, 'source_url', source_url)
-        self.update_params(attrs, 'title', title)
-        self.update_params(attrs, 'text', text)
-        self.update_params(attrs, 'link', link)
-        self.update_params(attrs, 'image', image)
-        self.update_params(attrs, 'image_url', image_url)
-        self.update_params(attrs, 'folder', folder)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'parent_id', parent_id)
-        self.update_params(attrs, 'data_key', data_key)
-        attrs['params'].update(kwargs)
-        self.api_call(**attrs)
-
-    def data_update(self, project_id, collection_id=None, collection_key=None, data_id=None, data_key=None,
-                    update_method='replace', user_name=None, source_url=None, title=None, text=None,
-                    link=None, image=None, image_url=None, folder=None, state=None, parent_id=None,
-                    message_id=None, **kwargs):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        assert data_id or data_key, "data_id or data_key required"
-        attrs = self.get_standard_params('data.update', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'data_id', data_id)
-        self.update_params(attrs, 'data_key', data_key)
-        self.update_params(attrs, 'update_method', update_method)
-        self.update_params(attrs, 'user_name', user_name)
-        self.update_params(attrs, 'source_url', source_url)
-        self.update_params(attrs, 'title', title)
-        self.update_params(attrs, 'text', text)
-        self.update_params(attrs, 'link', link)
-        self.update_params(attrs, 'image', image)
-        self.update_params(attrs, 'image_url', image_url)
-        self.update_params(attrs, 'folder', folder)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'parent_id', parent_id)
-        attrs['params'].update(kwargs)
-        self.api_call(**attrs)
-
-    def data_get(self, project_id, collection_id=None, collection_key=None, state='All', folders=[], since_id=None,
-                 max_id=None, since_time=None, limit=100, order='ASC', order_by='created_at', filter=None,
-                 include_children=True, depth=None, children_limit=100, parent_ids=[], by_user=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.get', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'folders', folders)
-        self.update_params(attrs, 'since_id', since_id)
-        self.update_params(attrs, 'max_id', max_id)
-        self.update_params(attrs, 'since_time', since_time)
-        self.update_params(attrs, 'limit', limit)
-        self.update_params(attrs, 'order', order)
-        self.update_params(attrs, 'order_by', order_by)
-        self.update_params(attrs, 'filter', filter)
-        self.update_params(attrs, 'include_children', include_children)
-        self.update_params(attrs, 'depth', depth)
-        self.update_params(attrs, 'children_limit', children_limit)
-        self.update_params(attrs, 'parent_ids', parent_ids)
-        self.update_params(attrs, 'by_user', by_user)
-        self.api_call(**attrs)
-
-    def data_get_one(self, project_id, collection_id=None, collection_key=None, data_id=None,
-                     data_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.get_one', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'data_id', data_id)
-        self.update_params(attrs, 'data_key', data_key)
-        self.api_call(**attrs)
-
-    def data_move(self, project_id, collection_id=None, collection_key=None, data_ids=[], state='All', folders=[],
-                  filter=None, by_user=None, limit=100, new_folder=None, new_state=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.move', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'data_ids', data_ids)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'folders', folders)
-        self.update_params(attrs, 'filter', filter)
-        self.update_params(attrs, 'by_user', by_user)
-        self.update_params(attrs, 'limit', limit)
-        self.update_params(attrs, 'new_folder', new_folder)
-        self.update_params(attrs, 'new_state', new_state)
-        self.api_call(**attrs)
-
-    def data_copy(self, project_id, data_ids, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.copy', message_id)
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['data_ids'] = data_ids
-        self.api_call(**attrs)
-
-    def data_add_parent(self, project_id, data_id, collection_id=None, collection_key=None,
-                        parent_id=None, remove_other=False, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.add_parent', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['data_id'] = data_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'parent_id', parent_id)
-        self.update_params(attrs, 'remove_other', remove_other)
-        self.api_call(**attrs)
-
-    def data_remove_parent(self, project_id, data_id, collection_id=None, collection_key=None,
-                           parent_id=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.remove_parent', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['data_id'] = data_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'parent_id', parent_id)
-        self.api_call(**attrs)
-
-    def data_add_child(self, project_id, data_id, collection_id=None, collection_key=None,
-                       child_id=None, remove_other=False, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.add_child', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['data_id'] = data_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'child_id', child_id)
-        self.update_params(attrs, 'remove_other', remove_other)
-        self.api_call(**attrs)
-
-    def data_remove_child(self, project_id, data_id, collection_id=None, collection_key=None,
-                          child_id=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.remove_child', message_id)
-        attrs['params']['project_id'] = project_id
-        attrs['params']['data_id'] = data_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'child_id', child_id)
-        self.api_call(**attrs)
-
-    def data_delete(self, project_id, collection_id=None, collection_key=None, data_ids=[],
-                    state='All', folders=None, filter=None, by_user=None, limit=100, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.delete', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'data_ids', data_ids)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'folders', folders)
-        self.update_params(attrs, 'filter', filter)
-        self.update_params(attrs, 'by_user', by_user)
-        self.update_params(attrs, 'limit', limit)
-        self.api_call(**attrs)
-
-    def data_count(self, project_id, collection_id=None, collection_key=None, state='All', folders=None,
-                   filter=None, by_user=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('data.count', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'folders', folders)
-        self.update_params(attrs, 'filter', filter)
-        self.update_params(attrs, 'by_user', by_user)
-        self.api_call(**attrs)
+    data = NamespaceProperty('data')
 
 
 class UserMixin(BaseMixin):
 
-    def user_new(self, user_name, nick=None, avatar=None, message_id=None):
-        attrs = self.get_standard_params('user.new', message_id)
-        attrs['params']['user_name'] = user_name
-        self.update_params(attrs, 'nick', nick)
-        self.update_params(attrs, 'avatar', avatar)
-        self.api_call(**attrs)
-
-    def user_get_all(self, since_id=None, limit=100, message_id=None):
-        attrs = self.get_standard_params('user.get_all', message_id)
-        self.update_params(attrs, 'since_id', since_id)
-        self.update_params(attrs, 'limit', limit)
-        self.api_call(**attrs)
-
-    def user_get(self, project_id, collection_id=None, collection_key=None,
-                 state='All', folders=None, filter=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('user.get', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'folders', folders)
-        self.update_params(attrs, 'filter', filter)
-        self.api_call(**attrs)
-
-    def user_get_one(self, user_id=None, user_name=None, message_id=None):
-        assert user_id or user_name, "user_id or user_name required"
-        attrs = self.get_standard_params('user.get_one', message_id)
-        self.update_params(attrs, 'user_id', user_id)
-        self.update_params(attrs, 'user_name', user_name)
-        self.api_call(**attrs)
-
-    def user_update(self, user_id=None, user_name=None, nick=None, avatar=None, message_id=None):
-        assert user_id or user_name, "user_id or user_name required"
-        attrs = self.get_standard_params('user.update', message_id)
-        self.update_params(attrs, 'user_id', user_id)
-        self.update_params(attrs, 'user_name', user_name)
-        self.update_params(attrs, 'nick', nick)
-        self.update_params(attrs, 'avatar', avatar)
-        self.api_call(**attrs)
-
-    def user_count(self, project_id=None, collection_id=None, collection_key=None,
-                   state='All', folders=None, filter=None, message_id=None):
-        attrs = self.get_standard_params('user.count', message_id)
-        self.update_params(attrs, 'project_id', project_id)
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.update_params(attrs, 'state', state)
-        self.update_params(attrs, 'folders', folders)
-        self.update_params(attrs, 'filter', filter)
-        self.api_call(**attrs)
-
-    def user_delete(self, user_id=None, user_name=None, message_id=None):
-        assert user_id or user_name, "user_id or user_name required"
-        attrs = self.get_standard_params('user.delete', message_id)
-        self.update_params(attrs, 'user_id', user_id)
-        self.update_params(attrs, 'user_name', user_name)
-        self.api_call(**attrs)
+    user = NamespaceProperty('user')
 
 
 class NotificationMixin(BaseMixin):
 
-    def notification_send(self, uuid=None, api_client_id=None, message_id=None, **kwargs):
-        attrs = self.get_standard_params('notification.send', message_id)
-        self.update_params(attrs, 'uuid', uuid)
-        self.update_params(attrs, 'api_client_id', api_client_id)
-        attrs['params'].update(kwargs)
-        self.api_call(**attrs)
-
-    def notification_get_history(self, api_client_id=None, client_login=None, since_id=None,
-                                 since_time=None, limit=100, order=None, message_id=None):
-        attrs = self.get_standard_params('notification.get_history', message_id)
-        self.update_params(attrs, 'api_client_id', api_client_id)
-        self.update_params(attrs, 'client_login', client_login)
-        self.update_params(attrs, 'since_id', since_id)
-        self.update_params(attrs, 'since_time', since_time)
-        self.update_params(attrs, 'limit', limit)
-        self.update_params(attrs, 'order', order)
-        self.api_call(**attrs)
+    notification = NamespaceProperty('notification')
 
 
 class SubscriptionMixin(BaseMixin):
 
-    def subscription_subscribe_project(self, project_id, message_id=None):
-        attrs = self.get_standard_params('subscription.subscribe_project', message_id)
-        attrs['params']['project_id'] = project_id
-        self.api_call(**attrs)
+    subscription = NamespaceProperty('subscription')
 
-    def subscription_unsubscribe_project(self, project_id, message_id=None):
-        attrs = self.get_standard_params('subscription.unsubscribe_project', message_id)
-        attrs['params']['project_id'] = project_id
-        self.api_call(**attrs)
 
-    def subscription_subscribe_collection(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('subscription.subscribe_collection', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
+API_MIXINS = dict(admin=AdminMixin, apikey=ApikeyMixin, role=RoleMixin, connection=ConnectionMixin,
+                  project=ProjectMixin, collection=CollectionMixin, folder=FolderMixin, data=DataObjectMixin,
+                  user=UserMixin, notification=NotificationMixin, subscription=SubscriptionMixin)
 
-    def subscription_unsubscribe_collection(self, project_id, collection_id=None, collection_key=None, message_id=None):
-        assert collection_id or collection_key, "collection_id or collection_key required"
-        attrs = self.get_standard_params('subscription.unsubscribe_collection', message_id)
-        attrs['params']['project_id'] = project_id
-        self.update_params(attrs, 'collection_id', collection_id)
-        self.update_params(attrs, 'collection_key', collection_key)
-        self.api_call(**attrs)
-
-    def subscription_get(self, api_client_id=None, client_login=None, message_id=None):
-        attrs = self.get_standard_params('subscription.get', message_id)
-        self.update_params(self, 'api_client_id', api_client_id)
-        self.update_params(self, 'client_login', client_login)
-        self.api_call(**attrs)
+for spec in API_SCHEMA:
+    setattr(API_MIXINS[spec.namespace], spec.name, compile_async_method(spec))
 
 
 class SyncanoAsyncApi(AdminMixin, ApikeyMixin, RoleMixin, ProjectMixin, CollectionMixin, FolderMixin,
                       UserMixin, DataObjectMixin, NotificationMixin, SubscriptionMixin, ConnectionMixin):
 
-    def __init__(self, instance, api_key, host=None, port=None, timeout=1, **kwargs):
-        self.cli = SyncanoClient(instance, api_key, host=host, port=port, syncano=self, **kwargs)
+    def __init__(self, instance, api_key, host=None, port=None, timeout=1, auth_timeout=30, lazy=False, cache=None,
+                 **kwargs):
+        self.instance = instance
+        self.api_key = api_key
+        self.host = host
+        self.port = port
         self.timeout = timeout
-        self.cached_prefix = ''
+        self.auth_timeout = auth_timeout
+        self.cache = cache
+        self.listeners = [cache.invalidate_notification] if cache is not None else []
+        self.client_kwargs = kwargs
+        self.cli = None
+        if not lazy:
+            self.connect()
+
+    def connect(self):
+        kwargs = dict(self.client_kwargs)
+        kwargs.setdefault('syncano', self)
+        self.cli = SyncanoClient(self.instance, self.api_key, host=self.host, port=self.port,
+                                 listeners=self.listeners, **kwargs)
+        self.wait_for_auth()
+
+    def wait_for_auth(self):
+        deadline = time.time() + self.auth_timeout
         while self.cli.authorized is None:
-            self.get_message(blocking=False)
-            time.sleep(timeout)
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.cli.disconnect()
+                raise TimeoutException('authorization')
+            if not self.cli.poll(min(remaining, self.timeout)):
+                raise ConnectionLost
         if not self.cli.authorized:
             raise AuthException
 
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
     def get_message(self, blocking=True, message_id=None):
-        if message_id:
-            for i, r in enumerate(self.cli.results):
-                if r.get('message_id', None) == message_id:
-                    return self.cli.results.pop(i)
-        else:
-            if self.cli.results:
-                return self.cli.results.pop(0)
-        while asyncore.socket_map:
-            asyncore.loop(timeout=1, count=1)
-            if message_id:
-                for i, r in enumerate(self.cli.results):
-                    if r.get('message_id', None) == message_id:
-                        return self.cli.results.pop(i)
-            else:
-                if self.cli.results:
-                    return self.cli.results.pop(0)
-            if not blocking:
+        if self.cli is None:
+            self.connect()
+        result = self.cli.pop_result(message_id)
+        while result is None:
+            if not self.cli.poll(self.timeout):
+                raise ConnectionLost
+            result = self.cli.pop_result(message_id)
+            if result is None and not blocking:
                 return
-        raise ConnectionLost
+        if isinstance(result, ConnectionLost):
+            raise result
+        return result
+
+    def create_future(self, message_id=None, formatter=None):
+        if self.cli is None:
+            self.connect()
+        message_id = message_id or self.cli.next_message_id()
+        assert message_id not in self.cli.futures, u"message_id {0!s} already in use".format(message_id)
+        future = SyncanoFuture(self, message_id, formatter)
+        self.cli.futures[message_id] = future
+        return future
+
+    def wait(self, future, timeout=None):
+        deadline = time.time() + timeout if timeout is not None else None
+        while not future.done():
+            poll = self.timeout
+            if deadline is not None:
+                poll = deadline - time.time()
+                if poll <= 0:
+                    raise TimeoutException(future.message_id)
+                poll = min(poll, self.timeout)
+            if not self.cli.poll(poll):
+                raise ConnectionLost
 
     def send_message(self, message):
+        if self.cli is None:
+            self.connect()
+        if self.cli.over_high_watermark():
+            self.drain()
         self.cli.write_to_buffer(message)
 
+    def drain(self):
+        cli = self.cli
+        cli.write_pauses += 1
+        logger.info(u'%s - %d bytes queued, waiting for the write buffer to drain', cli.name, cli.pending_bytes)
+        while cli.pending_bytes > cli.low_watermark:
+            if not cli.poll(self.timeout):
+                raise ConnectionLost
+
     def close(self):
-        self.cli.handle_close()
+        if self.cli is not None:
+            self.cli.disconnect()
 
     def __enter__(self):
         return self
@@ -710,69 +725,255 @@ class SyncanoAsyncApi(AdminMixin, ApikeyMixin, RoleMixin, ProjectMixin, Collecti
     def __exit__(self, type, value, traceback):
         self.close()
 
-    def __getattribute__(self, item):
-        for prefix in ['admin_', 'apikey_', 'role_', 'folder_', 'project_', 'collection_',
-                       'data_', 'notification_', 'subscription_', 'user_', 'connection_']:
-            if not item.startswith(prefix) and item.startswith(prefix[:-1]):
-                self.cached_prefix = prefix
-                return self
-            elif item != 'cached_prefix':
-                temp_prefix = self.cached_prefix
-                self.cached_prefix = ''
-                if temp_prefix:
-                    return self.__getattribute__(temp_prefix + item)
-        return super(SyncanoAsyncApi, self).__getattribute__(item)
-
     def api_call(self, **kwargs):
         data = {'type': 'call'}
         data.update(kwargs)
         self.send_message(data)
 
 
-def format_result(f, instance, message_id, args, kwargs):
-    r = instance.get_message(blocking=True, message_id=message_id)
-    if isinstance(instance.cli.callback, ObjectCallback):
-
-        fname = f.__name__
-        if fname.startswith('collection_'):
-            r.project_id = args[0]
-        if fname.startswith('folder_') or fname.startswith('data_'):
-            params_offset = 0
-            if fname in ['folder_new', 'folder_update', 'folder_get_one', 'data_remove_child',
-                         'data_remove_parent', 'data_add_child', 'data_add_parent', 'data_copy']:
-                params_offset = 1
-            r.project_id = args[0]
-            if 'collection_id' in kwargs:
-                r.collection_id = kwargs['collection_id']
+class Descending(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def missing_last(value, descending=False):
+    return (value is None) != descending, value
+
+
+def sorted_stream(stream, key, reverse=False):
+    try:
+        for item in sorted(stream, key=key, reverse=reverse):
+            yield item
+    finally:
+        stream.close()
+
+
+def merge_sorted(streams, key, reverse=False):
+    heap = []
+    for index, stream in enumerate(streams):
+        for item in stream:
+            value = key(item)
+            heap.append((Descending(value) if reverse else value, index, item))
+            break
+    heapq.heapify(heap)
+    while heap:
+        _, index, item = heap[0]
+        yield item
+        for item in streams[index]:
+            value = key(item)
+            heapq.heapreplace(heap, (Descending(value) if reverse else value, index, item))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+class SyncanoApi(SyncanoAsyncApi):
+
+    def __init__(self, instance, api_key, *args, **kwargs):
+        self.pipelined = kwargs.pop('pipelined', False)
+        super(SyncanoApi, self).__init__(instance, api_key, *args, **kwargs)
+
+    def cached_result(self, value):
+        if not self.pipelined:
+            return value
+        future = SyncanoFuture(self, None)
+        future.set_result(value)
+        return future
+
+    def call_future(self, name, *args, **kwargs):
+        future = self.create_future(None, kwargs.pop('formatter', None))
+        getattr(super(SyncanoApi, self), name)(*args, message_id=future.message_id, **kwargs)
+        return future
+
+    def scoped_future(self, name, project_id, collection_id=None, collection_key=None, **params):
+        scope = dict(project_id=project_id, collection_id=collection_id, collection_key=collection_key)
+        formatter = lambda r: annotate_result(self, ANNOTATED_FIELDS['data'], scope, r)
+        return self.call_future(name, project_id, collection_id=collection_id, collection_key=collection_key,
+                                formatter=formatter, **params)
+
+    def bulk_data_new(self, project_id, records, collection_id=None, collection_key=None, window=256):
+        assert collection_id or collection_key, "collection_id or collection_key required"
+        assert window > 0, "window must be positive"
+        report = BulkReport()
+        in_flight = collections.deque()
+        for record in records:
+            in_flight.append(self.scoped_future('data_new', project_id, collection_id, collection_key, **record))
+            if len(in_flight) >= window:
+                report.add(in_flight.popleft())
             else:
-                try:
-                    r.collection_id = int(args[1 + params_offset])
-                except (TypeError, IndexError):
-                    r.collection_id = None
-                    params_offset -= 1
-            if 'collection_key' in kwargs:
-                r.collection_key = kwargs['collection_key']
-            elif len(args) > 2 + params_offset:
-                r.collection_key = args[2 + params_offset]
+                self.cli.poll(0)
+        while in_flight:
+            report.add(in_flight.popleft())
+        report.finish()
+        logger.info(u'%s - bulk data.new: %d records, %d errors, %.0f records/s', self.cli.name, report.count,
+                    report.errors, report.rate)
+        return report
+
+    def iter_data(self, project_id, collection_id=None, collection_key=None, page_size=100, order='ASC', **filters):
+        assert collection_id or collection_key, "collection_id or collection_key required"
+        assert filters.get('order_by', 'created_at') == 'created_at', u"pages follow ids, order_by must be created_at"
+        cursor = 'since_id' if order.upper() == 'ASC' else 'max_id'
+        filters.update(limit=page_size, order=order, order_by='created_at')
+        fetch = functools.partial(self.scoped_future, 'data_get', project_id, collection_id, collection_key)
+        return self.follow_pages(fetch(**filters), fetch, filters, cursor)
+
+    def load_frame(self, project_id, collection_id=None, collection_key=None, page_size=1000, order='ASC', **filters):
+        from syncano.frames import ColumnFrame
+        assert collection_id or collection_key, "collection_id or collection_key required"
+        if self.cli is None:
+            self.connect()
+        assert not isinstance(self.cli.callback, ObjectCallback), u"use FrameCallback or JsonCallback"
+        cursor = 'since_id' if order.upper() == 'ASC' else 'max_id'
+        filters.update(limit=page_size, order=order, order_by='created_at')
+        fetch = functools.partial(self.scoped_future, 'data_get', project_id, collection_id, collection_key)
+        frames = []
+        future = fetch(**filters)
+        while future is not None:
+            page = future.result()
+            frame = page if isinstance(page, ColumnFrame) else ColumnFrame.from_rows(page['data']['data'])
+            future = None
+            if len(frame) >= page_size:
+                filters[cursor] = str(frame['id'][-1])
+                future = fetch(**filters)
+                self.cli.poll(0)
+            frames.append(frame)
+        return ColumnFrame.concat(frames, project_id=project_id, collection_id=collection_id,
+                                  collection_key=collection_key)
+
+    def follow_pages(self, future, fetch, filters, cursor=None):
+        try:
+            while future is not None:
+                page = future.result()
+                items = page['data']['data'] if isinstance(page, dict) else list(page)
+                future = None
+                if cursor is not None and len(items) >= filters['limit']:
+                    filters[cursor] = items[-1].get('id')
+                    future = fetch(**filters)
+                    self.cli.poll(0)
+                for item in items:
+                    yield item
+        finally:
+            if future is not None:
+                future.cancel()
+
+    def merge_data(self, targets, order_by='created_at', order='ASC', limit=None, page_size=100, **filters):
+        assert order_by == 'created_at' or limit, u"only created_at pages by id, pass limit for other orderings"
+        page_size = min(page_size, limit) if limit else page_size
+        descending = order.upper() == 'DESC'
+        key = lambda item: missing_last(item.get(order_by), descending)
+        streams = []
+        try:
+            for target in self.expand_targets(targets):
+                params = dict(filters, **target)
+                if order_by == 'created_at':
+                    streams.append(self.iter_data(page_size=page_size, order=order, **params))
+                else:
+                    params.update(limit=limit, order=order, order_by=order_by)
+                    fetch = functools.partial(self.scoped_future, 'data_get')
+                    streams.append(sorted_stream(self.follow_pages(fetch(**params), fetch, params), key, descending))
+            merged = merge_sorted(streams, key, descending)
+            for item in itertools.islice(merged, limit):
+                yield item
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def expand_targets(self, targets):
+        expanded, projects = [], []
+        for target in targets:
+            if target.get('collection_id') or target.get('collection_key'):
+                expanded.append(target)
             else:
-                r.collection_key = None
-    return r
+                projects.append((target, self.call_future('collection_get', target['project_id'])))
+        for target, future in projects:
+            result = future.result()
+            for collection in (result['data']['collection'] if isinstance(result, dict) else result):
+                expanded.append(dict(target, collection_id=collection.get('id')))
+        return expanded
+
+    def tail_notifications(self, since_id=None, since_time=None, page_size=100, timeout=None, **kwargs):
+        checkpoint = int(since_id) if since_id is not None else None
+        kwargs.update(since_id=since_id, since_time=since_time, limit=page_size, order='ASC')
+        while True:
+            result = self.call_future('notification_get_history', **kwargs).result()
+            history = result['data']['history'] if isinstance(result, dict) else result.history
+            for message in history:
+                if not isinstance(message, dict):
+                    message = message.as_dict()
+                checkpoint = int(message.get('id'))
+                yield message
+            if len(history) < page_size:
+                break
+            kwargs.update(since_id=checkpoint, since_time=None)
+        deadline = time.time() + timeout if timeout is not None else None
+        while deadline is None or time.time() < deadline:
+            message = self.get_message(blocking=False)
+            if message is None or message.get('type') not in NOTIFICATION_TYPES:
+                continue
+            if message.get('id') is not None and checkpoint is not None:
+                if int(message['id']) <= checkpoint:
+                    continue
+                checkpoint = int(message['id'])
+            if deadline is not None:
+                deadline = time.time() + timeout
+            yield message
 
 
-def api_result_decorator(f, instance):
-    def wrapper(*args, **kwargs):
-        message_id = kwargs.pop('message_id', str(int(time.time()*10**4)))
-        kwargs['message_id'] = message_id
-        f(*args, **kwargs)
-        return format_result(f, instance, message_id, args, kwargs)
-    return wrapper
+for spec in API_SCHEMA:
+    setattr(SyncanoApi, spec.name, compile_sync_method(spec))
 
 
-class SyncanoApi(SyncanoAsyncApi):
+class SyncanoApiPool(object):
+
+    def __init__(self, instance, api_key, size=4, host=None, port=None, **kwargs):
+        assert not kwargs.get('pipelined'), u"futures poll their connection outside the pool lock, use SyncanoApi"
+        kwargs.setdefault('syncano', self)
+        self.connections = [SyncanoApi(instance, api_key, host=host, port=port, **kwargs) for _ in range(size)]
+        self.connection_locks = [threading.Lock() for _ in range(size)]
+        self.in_flight = [0] * size
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            index = min(range(len(self.in_flight)), key=self.in_flight.__getitem__)
+            self.in_flight[index] += 1
+        return index
+
+    def release(self, index):
+        with self.lock:
+            self.in_flight[index] -= 1
+
+    def call(self, method, *args, **kwargs):
+        index = self.acquire()
+        try:
+            with self.connection_locks[index]:
+                return getattr(self.connections[index], method)(*args, **kwargs)
+        finally:
+            self.release(index)
 
-    def __getattribute__(self, item):
-        for prefix in ['admin_', 'apikey_', 'role_', 'connection_', 'folder_', 'project_', 'collection_',
-                       'data_', 'notification_', 'subscription_', 'user_']:
-            if item.startswith(prefix):
-                return api_result_decorator(super(SyncanoApi, self).__getattribute__(item), self)
-        return super(SyncanoApi, self).__getattribute__(item)
\ No newline at end of file
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __getattr__(self, item):
+        if item in API_NAMESPACES:
+            attr = ApiNamespace(self, item)
+        elif item.split('_', 1)[0] in API_NAMESPACES and hasattr(SyncanoApi, item):
+            attr = functools.partial(self.call, item)
+        else:
+            raise AttributeError(item)
+        setattr(self, item, attr)
+        return attr
@@ -0,0 +1,91 @@
+import collections
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+
+class JsonCodec(object):
+
+    name = 'json'
+    module = json
+
+    def __init__(self):
+        self.encoder = self.module.JSONEncoder(separators=(',', ':'))
+        self.decoder = self.module.JSONDecoder()
+
+    def dumps(self, data):
+        return self.encoder.encode(data).encode('utf-8')
+
+    def dump_frame(self, data):
+        return (self.encoder.encode(data) + '\n').encode('utf-8')
+
+    def loads(self, data):
+        return self.decoder.decode(data)
+
+
+class SimplejsonCodec(JsonCodec):
+
+    name = 'simplejson'
+    module = simplejson
+
+
+class UjsonCodec(object):
+
+    name = 'ujson'
+
+    def dumps(self, data):
+        return ujson.dumps(data).encode('utf-8')
+
+    def dump_frame(self, data):
+        return (ujson.dumps(data) + '\n').encode('utf-8')
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+class OrjsonCodec(object):
+
+    name = 'orjson'
+
+    def dumps(self, data):
+        return orjson.dumps(data)
+
+    def dump_frame(self, data):
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+CODECS = collections.OrderedDict([
+    ('orjson', (orjson, OrjsonCodec)),
+    ('ujson', (ujson, UjsonCodec)),
+    ('simplejson', (simplejson, SimplejsonCodec)),
+    ('json', (json, JsonCodec)),
+])
+
+
+def available_codecs():
+    return [name for name, (module, _) in CODECS.items() if module is not None]
+
+
+def get_codec(name=None):
+    if name is None:
+        name = available_codecs()[0]
+    module, codec_class = CODECS[name]
+    if module is None:
+        raise ImportError(u'{0} is not installed'.format(name))
+    return codec_class()
@@ -22,4 +22,13 @@ class ConnectionLost(Exception):
         self.value = "Connection lost: " + repr(value)
 
     def __str__(self):
-        return self.value
\ No newline at end of file
+        return self.value
+
+
+class TimeoutException(Exception):
+
+    def __init__(self, value='No response from server'):
+        self.value = "Timeout: " + repr(value)
+
+    def __str__(self):
+        return self.value
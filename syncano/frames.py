@@ -0,0 +1,258 @@
+import collections
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from syncano.callbacks import DataObject, JsonCallback, unicode_types
+
+
+ID_COLUMNS = ('id', 'parent_id', 'user_id')
+TIME_COLUMNS = ('created_at', 'updated_at')
+SHARED_STRING_COLUMNS = ('folder', 'state', 'user_name')
+STRING_COLUMNS = ('key', 'title', 'text', 'link', 'source_url', 'image_url')
+SCOPE_FIELDS = ('project_id', 'collection_id', 'collection_key')
+
+if sys.version_info[0] >= 3:
+    integer_types = (int,)
+else:
+    integer_types = (int, long)
+
+
+def shared_strings(values):
+    pool = {}
+    return object_column([pool.setdefault(v, v) if isinstance(v, unicode_types) else v for v in values])
+
+
+def object_column(values):
+    column = numpy.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def timestamp_column(values):
+    return numpy.array([v.rstrip('Z') if v else 'NaT' for v in values], dtype='datetime64[us]')
+
+
+def additional_column(values):
+    types = set(type(v) for v in values)
+    if types == set([bool]):
+        return numpy.array(values, dtype=bool)
+    if types and types <= set(integer_types):
+        return numpy.array(values, dtype=numpy.int64)
+    if types and types <= set(integer_types + (float, type(None))) and types != set([type(None)]):
+        return numpy.array([numpy.nan if v is None else v for v in values], dtype=numpy.float64)
+    return shared_strings(values)
+
+
+def integral_values(values):
+    types = set(type(v) for v in values)
+    return None in values and bool(types - set([type(None)])) and types <= set(integer_types + (type(None),))
+
+
+def missing_mask(column):
+    if column.dtype == object:
+        return numpy.equal(column, None)
+    if column.dtype.kind == 'f':
+        return numpy.isnan(column)
+    if column.dtype.kind == 'M':
+        return numpy.isnat(column)
+    return numpy.zeros(len(column), dtype=bool)
+
+
+def factorize(column):
+    missing = missing_mask(column)
+    if not missing.any():
+        return numpy.unique(column, return_inverse=True)
+    keys, inverse = numpy.unique(column[~missing], return_inverse=True)
+    codes = numpy.full(len(column), len(keys), dtype=numpy.intp)
+    codes[~missing] = inverse.ravel()
+    return numpy.append(keys.astype(object), None), codes
+
+
+def scalar(value):
+    if isinstance(value, numpy.datetime64):
+        return None if numpy.isnat(value) else numpy.datetime_as_string(value, unit='us') + 'Z'
+    if isinstance(value, numpy.floating) and numpy.isnan(value):
+        return None
+    if isinstance(value, numpy.generic):
+        return value.item()
+    return value
+
+
+class ColumnFrame(object):
+
+    def __init__(self, columns, additional=(), integral=(), **scope):
+        assert numpy is not None, u"ColumnFrame requires numpy"
+        self.columns = collections.OrderedDict(columns)
+        self.additional = tuple(additional)
+        self.integral = frozenset(integral)
+        self.length = len(next(iter(self.columns.values()))) if self.columns else 0
+        for field in SCOPE_FIELDS:
+            setattr(self, field, scope.get(field))
+
+    @classmethod
+    def from_rows(cls, rows, **scope):
+        rows = list(rows)
+        columns = collections.OrderedDict()
+        users = [r.get('user') or {} for r in rows]
+        for name in ID_COLUMNS:
+            values = [u.get('id') for u in users] if name == 'user_id' else [r.get(name) for r in rows]
+            columns[name] = numpy.array([-1 if v is None else int(v) for v in values], dtype=numpy.int64)
+        for name in TIME_COLUMNS:
+            columns[name] = timestamp_column([r.get(name) for r in rows])
+        for name in SHARED_STRING_COLUMNS:
+            values = [u.get('name') for u in users] if name == 'user_name' else [r.get(name) for r in rows]
+            columns[name] = shared_strings(values)
+        for name in STRING_COLUMNS:
+            if name == 'image_url':
+                values = [(r.get('image') or {}).get('image_url') for r in rows]
+            else:
+                values = [r.get(name) for r in rows]
+            columns[name] = object_column(values)
+        extras = [r.get('additional') or {} for r in rows]
+        names = collections.OrderedDict()
+        for extra in extras:
+            for name in extra:
+                names[name] = True
+        additional, integral = [], []
+        for name in names:
+            column = name if name not in columns else 'additional_' + name
+            values = [extra.get(name) for extra in extras]
+            columns[column] = additional_column(values)
+            additional.append(column)
+            if integral_values(values):
+                integral.append(column)
+        return cls(columns, additional, integral, **scope)
+
+    @classmethod
+    def concat(cls, frames, **scope):
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return cls.from_rows([], **scope)
+        first = frames[0]
+        for field in SCOPE_FIELDS:
+            scope.setdefault(field, getattr(first, field))
+        names = list(first.columns)
+        additional = list(first.additional)
+        for frame in frames[1:]:
+            for name in frame.columns:
+                if name not in names:
+                    names.append(name)
+                    additional.append(name)
+        columns = collections.OrderedDict()
+        integral = []
+        for name in names:
+            parts = [f.columns[name] if name in f.columns else f.missing(name, frames) for f in frames]
+            columns[name] = numpy.concatenate(parts)
+            present = [f for f in frames if name in f.columns]
+            if columns[name].dtype.kind == 'f' and all(name in f.integral or f.columns[name].dtype.kind == 'i'
+                                                       for f in present):
+                integral.append(name)
+        return cls(columns, additional, integral, **scope)
+
+    def missing(self, name, frames):
+        dtype = next(f.columns[name].dtype for f in frames if name in f.columns)
+        if dtype.kind in 'iuf':
+            return numpy.full(self.length, numpy.nan)
+        return numpy.full(self.length, None, dtype=object)
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, key):
+        if isinstance(key, unicode_types):
+            return self.columns[key]
+        return self.take(key)
+
+    def get(self, key, default=None):
+        return self.columns.get(key, default)
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.columns.values())
+
+    def take(self, selection):
+        scope = dict((field, getattr(self, field)) for field in SCOPE_FIELDS)
+        columns = [(name, column[selection]) for name, column in self.columns.items()]
+        return ColumnFrame(columns, self.additional, self.integral, **scope)
+
+    def sort(self, by, descending=False):
+        column = self.columns[by]
+        missing = missing_mask(column)
+        present = numpy.flatnonzero(~missing)
+        order = present[numpy.argsort(column[present], kind='mergesort')]
+        if descending:
+            order = order[::-1]
+        return self.take(numpy.concatenate([order, numpy.flatnonzero(missing)]))
+
+    def value(self, name, value):
+        value = scalar(value)
+        if value is not None and name in self.integral:
+            return int(value)
+        return value
+
+    def group_by(self, by):
+        keys, inverse = factorize(self.columns[by])
+        order = numpy.argsort(inverse, kind='mergesort')
+        bounds = numpy.cumsum(numpy.bincount(inverse, minlength=len(keys)))[:-1]
+        return collections.OrderedDict((self.value(by, key), self.take(indices))
+                                       for key, indices in zip(keys, numpy.split(order, bounds)))
+
+    def count_by(self, by):
+        keys, inverse = factorize(self.columns[by])
+        counts = numpy.bincount(inverse, minlength=len(keys))
+        return collections.OrderedDict((self.value(by, k), int(c)) for k, c in zip(keys, counts))
+
+    def aggregate(self, by, column, func=None):
+        func = func or numpy.sum
+        return collections.OrderedDict((key, scalar(func(frame.columns[column])))
+                                       for key, frame in self.group_by(by).items())
+
+    def row(self, index):
+        values = dict((name, self.value(name, column[index])) for name, column in self.columns.items())
+        row = dict((name, values[name]) for name in ('folder', 'state') + TIME_COLUMNS + STRING_COLUMNS[:-1])
+        row['id'] = str(values['id'])
+        row['parent_id'] = str(values['parent_id']) if values['parent_id'] != -1 else None
+        row['user'] = dict(id=str(values['user_id']), name=values['user_name']) if values['user_id'] != -1 else None
+        row['image'] = dict(image_url=values['image_url']) if values['image_url'] else None
+        row['additional'] = dict((name[len('additional_'):] if name.startswith('additional_') else name,
+                                  values[name]) for name in self.additional if values[name] is not None)
+        return row
+
+    def rows(self):
+        for index in range(self.length):
+            yield self.row(index)
+
+    def __iter__(self):
+        return self.rows()
+
+    def to_objects(self, syncano=None, selection=None, **scope):
+        frame = self if selection is None else self.take(selection)
+        objects = []
+        for row in frame.rows():
+            obj = DataObject(syncano, row)
+            for field in SCOPE_FIELDS:
+                setattr(obj, field, scope.get(field, getattr(frame, field)))
+            objects.append(obj)
+        return objects
+
+
+class FrameCallback(JsonCallback):
+
+    def __init__(self, owner, **kwargs):
+        assert numpy is not None, u"FrameCallback requires numpy"
+        super(FrameCallback, self).__init__(owner, **kwargs)
+
+    def process_callresponse(self, received):
+        received = super(FrameCallback, self).process_callresponse(received)
+        rows = received['data'].get('data')
+        if isinstance(rows, list):
+            return ColumnFrame.from_rows(rows)
+        return received
@@ -0,0 +1,213 @@
+import calendar
+import collections
+import heapq
+import logging
+import time
+
+from syncano.cache import as_list
+from syncano.callbacks import ObjectCallback
+
+
+logger = logging.getLogger('syncano.replica')
+
+INDEXED_FIELDS = ('folder', 'state', 'user', 'parent_id')
+
+
+def parse_timestamp(value):
+    try:
+        seconds, _, fraction = value.rstrip('Z').partition('.')
+        return calendar.timegm(time.strptime(seconds, '%Y-%m-%dT%H:%M:%S')) + float('0.' + (fraction or '0'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def index_key(field, row):
+    value = row.get(field)
+    if field == 'user':
+        return value.get('name') if value else None
+    if field == 'parent_id' and value is not None:
+        return int(value)
+    return value
+
+
+class CollectionReplica(object):
+
+    def __init__(self, syncano, project_id, collection_id=None, collection_key=None, page_size=500, consume=True,
+                 auto_poll=True, start=True):
+        assert collection_id or collection_key, "collection_id or collection_key required"
+        if syncano.cli is None:
+            syncano.connect()
+        assert not isinstance(syncano.cli.callback, ObjectCallback), u"replica keeps raw rows, use JsonCallback"
+        self.syncano = syncano
+        self.project_id = str(project_id)
+        self.collection_id = str(collection_id) if collection_id else None
+        self.collection_key = collection_key
+        self.page_size = page_size
+        self.consume = consume
+        self.auto_poll = auto_poll
+        self.rows = {}
+        self.indexes = dict((field, collections.defaultdict(set)) for field in INDEXED_FIELDS)
+        self.pending = None
+        self.running = False
+        self.subscribed = False
+        self.applied = 0
+        self.lag = None
+        self.max_lag = None
+        self.synced_at = None
+        self.bootstrap_time = None
+        if start:
+            self.start()
+
+    def start(self):
+        if self.collection_id is None:
+            collection = self.syncano.call_future('collection_get_one', self.project_id,
+                                                  collection_key=self.collection_key).result()
+            self.collection_id = str(collection['data']['collection']['id'])
+        self.pending = []
+        self.syncano.add_listener(self.handle_notification)
+        existing = self.syncano.call_future('subscription_get').result()['data']['subscription']
+        self.subscribed = not any(s['type'] == 'Collection' and str(s['id']) == self.collection_id
+                                  for s in existing)
+        if self.subscribed:
+            self.syncano.call_future('subscription_subscribe_collection', self.project_id,
+                                     collection_id=self.collection_id).result()
+        self.running = True
+        self.bootstrap()
+
+    def bootstrap(self):
+        started = time.time()
+        if self.pending is None:
+            self.pending = []
+        self.rows.clear()
+        for index in self.indexes.values():
+            index.clear()
+        for row in self.syncano.iter_data(self.project_id, self.collection_id, page_size=self.page_size):
+            self.upsert(row)
+        pending, self.pending = self.pending, None
+        for message in pending:
+            self.apply(message)
+        self.synced_at = time.time()
+        self.bootstrap_time = self.synced_at - started
+        logger.info(u'replica %s/%s - %d rows in %.2fs, %d notifications replayed', self.project_id,
+                    self.collection_id, len(self.rows), self.bootstrap_time, len(pending))
+
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        self.syncano.remove_listener(self.handle_notification)
+        if self.subscribed:
+            self.subscribed = False
+            self.syncano.call_future('subscription_unsubscribe_collection', self.project_id,
+                                     collection_id=self.collection_id).result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def handle_notification(self, message):
+        target = message.get('target') or message.get('channel') or {}
+        if message.get('object', 'data') != 'data' or str(target.get('collection_id')) != self.collection_id:
+            return False
+        if self.pending is not None:
+            self.pending.append(message)
+        else:
+            self.apply(message)
+        return self.consume
+
+    def apply(self, message):
+        target = message.get('target') or message.get('channel') or {}
+        data = message.get('data') or {}
+        if message['type'] == 'new':
+            self.upsert(data)
+        elif message['type'] == 'change':
+            for data_id in target.get('id') or [data.get('id')]:
+                row = self.rows.get(int(data_id))
+                if row is not None:
+                    self.upsert(dict(row, **data))
+        elif message['type'] == 'delete':
+            for data_id in target.get('id') or []:
+                self.remove(int(data_id))
+        self.applied += 1
+        sent_at = parse_timestamp(message.get('timestamp'))
+        if sent_at is not None:
+            self.lag = max(time.time() - sent_at, 0)
+            self.max_lag = max(self.max_lag or 0, self.lag)
+
+    def upsert(self, row):
+        row = dict(row)
+        row.pop('children', None)
+        data_id = int(row['id'])
+        self.remove(data_id)
+        self.rows[data_id] = row
+        for field, index in self.indexes.items():
+            index[index_key(field, row)].add(data_id)
+
+    def remove(self, data_id):
+        row = self.rows.pop(data_id, None)
+        if row is None:
+            return
+        for field, index in self.indexes.items():
+            key = index_key(field, row)
+            ids = index[key]
+            ids.discard(data_id)
+            if not ids:
+                del index[key]
+
+    def refresh(self, timeout=0):
+        if self.syncano.cli.poll(timeout):
+            self.synced_at = time.time()
+
+    def get(self, data_id):
+        if self.auto_poll:
+            self.refresh()
+        return self.rows.get(int(data_id))
+
+    def query(self, state='All', folders=None, by_user=None, parent_ids=None, order='ASC', limit=None):
+        if self.auto_poll:
+            self.refresh()
+        lookups = [('state', [state] if state and state != 'All' else None), ('folder', as_list(folders)),
+                   ('user', [by_user] if by_user else None),
+                   ('parent_id', [int(i) for i in as_list(parent_ids)])]
+        matches = []
+        for field, values in lookups:
+            if values:
+                index = self.indexes[field]
+                if len(values) == 1:
+                    matches.append(index.get(values[0], ()))
+                else:
+                    matches.append(set().union(*[index.get(value, ()) for value in values]))
+        if matches:
+            matches.sort(key=len)
+            ids = set(matches[0]).intersection(*matches[1:])
+        else:
+            ids = self.rows
+        descending = order.upper() == 'DESC'
+        if limit:
+            ids = heapq.nlargest(limit, ids) if descending else heapq.nsmallest(limit, ids)
+        else:
+            ids = sorted(ids, reverse=descending)
+        return [self.rows[data_id] for data_id in ids]
+
+    def count(self, **filters):
+        return len(self.query(**filters))
+
+    def staleness(self):
+        if self.synced_at is None:
+            return None
+        return time.time() - self.synced_at
+
+    def stats(self):
+        return dict(rows=len(self.rows), applied=self.applied, lag=self.lag, max_lag=self.max_lag,
+                    staleness=self.staleness(), bootstrap_time=self.bootstrap_time)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, data_id):
+        return int(data_id) in self.rows
+
+    def __iter__(self):
+        return iter(self.query())
@@ -0,0 +1,205 @@
+from syncano.cache import INVALIDATING_NAMESPACES, cache_formatter
+from syncano.callbacks import ObjectCallback
+
+
+COLLECTION = ('collection_id', 'collection_key')
+DATA = ('data_id', 'data_key')
+ADMIN = ('admin_id', 'admin_email')
+USER = ('user_id', 'user_name')
+IN_COLLECTION = 'project_id, collection_id=None, collection_key=None'
+
+ANNOTATED_FIELDS = {
+    'collection': ('project_id',),
+    'folder': ('project_id', 'collection_id', 'collection_key'),
+    'data': ('project_id', 'collection_id', 'collection_key'),
+}
+
+
+class ApiMethod(object):
+
+    def __init__(self, method, signature='', *one_of, **flags):
+        self.method = method
+        self.namespace, self.action = method.split('.')
+        self.name = self.namespace + '_' + self.action
+        self.kwargs = signature.endswith('**kwargs')
+        self.signature = signature.rsplit('**kwargs', 1)[0].rstrip(', ') if self.kwargs else signature
+        self.one_of = one_of
+        self.not_none = flags.get('not_none', ())
+        self.annotated = ANNOTATED_FIELDS.get(self.namespace, ())
+        self.cached = flags.get('cached', False)
+        self.read = flags.get('read', self.cached)
+        self.idempotent = flags.get('idempotent', self.read)
+        self.invalidating = self.namespace in INVALIDATING_NAMESPACES and not self.read
+        scope = {}
+        exec('def f({0}): pass'.format(self.signature), scope)
+        code, defaults = scope['f'].__code__, scope['f'].__defaults__ or ()
+        self.args = code.co_varnames[:code.co_argcount]
+        self.optional = self.args[len(self.args) - len(defaults):]
+        self.positional = self.args[:len(self.args) - len(defaults)]
+
+
+API_SCHEMA = (
+    ApiMethod('admin.new', 'admin_email, role_id, message'),
+    ApiMethod('admin.get', read=True),
+    ApiMethod('admin.get_one', 'admin_id=None, admin_email=None', ADMIN, read=True),
+    ApiMethod('admin.update', 'admin_id=None, admin_email=None, role_id=None', ADMIN, ('role_id',)),
+    ApiMethod('admin.delete', 'admin_id=None, admin_email=None', ADMIN),
+
+    ApiMethod('apikey.new', 'role_id, description'),
+    ApiMethod('apikey.get', read=True),
+    ApiMethod('apikey.get_one', 'api_client_id=None', read=True),
+    ApiMethod('apikey.update_description', 'api_client_id=None, description=None', not_none=('description',)),
+    ApiMethod('apikey.delete', 'api_client_id'),
+
+    ApiMethod('role.get', read=True),
+
+    ApiMethod('connection.get', 'api_client_id=None, name=None, since_id=None, limit=None', read=True),
+    ApiMethod('connection.update', 'uuid, state=None, name=None, api_client_id=None'),
+
+    ApiMethod('project.new', 'name'),
+    ApiMethod('project.get', read=True),
+    ApiMethod('project.get_one', 'project_id', cached=True),
+    ApiMethod('project.update', 'project_id, name'),
+    ApiMethod('project.delete', 'project_id'),
+
+    ApiMethod('collection.new', 'project_id, name, key'),
+    ApiMethod('collection.get', "project_id, status='all', with_tags=None", read=True),
+    ApiMethod('collection.get_one', IN_COLLECTION, COLLECTION, cached=True),
+    ApiMethod('collection.activate', IN_COLLECTION, COLLECTION),
+    ApiMethod('collection.deactivate', IN_COLLECTION, COLLECTION),
+    ApiMethod('collection.update', 'project_id, collection_id, name=None, collection_key=None'),
+    ApiMethod('collection.delete', IN_COLLECTION, COLLECTION),
+    ApiMethod('collection.add_tag', IN_COLLECTION + ', tags=[], weight=1, remove_other=False', COLLECTION),
+    ApiMethod('collection.delete_tag', IN_COLLECTION + ', tags=[]', COLLECTION),
+
+    ApiMethod('folder.new', 'project_id, name, collection_id=None, collection_key=None, source_id=None', COLLECTION),
+    ApiMethod('folder.get', IN_COLLECTION, COLLECTION, read=True),
+    ApiMethod('folder.get_one', 'project_id, folder_name, collection_id=None, collection_key=None', COLLECTION,
+              cached=True),
+    ApiMethod('folder.update', 'project_id, name, collection_id=None, collection_key=None, new_name=None, '
+                               'source_id=None', COLLECTION),
+    ApiMethod('folder.delete', 'project_id, name, collection_id=None, collection_key=None', COLLECTION),
+
+    ApiMethod('data.new', IN_COLLECTION + ", user_name=None, source_url=None, title=None, text=None, link=None, "
+                                         "image=None, image_url=None, folder=None, state='Pending', data_key=None, "
+                                         "parent_id=None, **kwargs", COLLECTION),
+    ApiMethod('data.update', IN_COLLECTION + ", data_id=None, data_key=None, update_method='replace', "
+                                            "user_name=None, source_url=None, title=None, text=None, link=None, "
+                                            "image=None, image_url=None, folder=None, state=None, parent_id=None, "
+                                            "**kwargs", COLLECTION, DATA),
+    ApiMethod('data.get', IN_COLLECTION + ", state='All', folders=[], since_id=None, max_id=None, since_time=None, "
+                                         "limit=100, order='ASC', order_by='created_at', filter=None, "
+                                         "include_children=True, depth=None, children_limit=100, parent_ids=[], "
+                                         "by_user=None", COLLECTION, read=True),
+    ApiMethod('data.get_one', IN_COLLECTION + ', data_id=None, data_key=None', COLLECTION, cached=True),
+    ApiMethod('data.move', IN_COLLECTION + ", data_ids=[], state='All', folders=[], filter=None, by_user=None, "
+                                          "limit=100, new_folder=None, new_state=None", COLLECTION),
+    ApiMethod('data.copy', 'project_id, data_ids, collection_id=None, collection_key=None', COLLECTION),
+    ApiMethod('data.add_parent', 'project_id, data_id, collection_id=None, collection_key=None, parent_id=None, '
+                                 'remove_other=False', COLLECTION),
+    ApiMethod('data.remove_parent', 'project_id, data_id, collection_id=None, collection_key=None, parent_id=None',
+              COLLECTION),
+    ApiMethod('data.add_child', 'project_id, data_id, collection_id=None, collection_key=None, child_id=None, '
+                                'remove_other=False', COLLECTION),
+    ApiMethod('data.remove_child', 'project_id, data_id, collection_id=None, collection_key=None, child_id=None',
+              COLLECTION),
+    ApiMethod('data.delete', IN_COLLECTION + ", data_ids=[], state='All', folders=None, filter=None, by_user=None, "
+                                            "limit=100", COLLECTION),
+    ApiMethod('data.count', IN_COLLECTION + ", state='All', folders=None, filter=None, by_user=None", COLLECTION,
+              read=True),
+
+    ApiMethod('user.new', 'user_name, nick=None, avatar=None'),
+    ApiMethod('user.get_all', 'since_id=None, limit=100', read=True),
+    ApiMethod('user.get', IN_COLLECTION + ", state='All', folders=None, filter=None", COLLECTION, read=True),
+    ApiMethod('user.get_one', 'user_id=None, user_name=None', USER, cached=True),
+    ApiMethod('user.update', 'user_id=None, user_name=None, nick=None, avatar=None', USER),
+    ApiMethod('user.count', "project_id=None, collection_id=None, collection_key=None, state='All', folders=None, "
+                            "filter=None", read=True),
+    ApiMethod('user.delete', 'user_id=None, user_name=None', USER),
+
+    ApiMethod('notification.send', 'uuid=None, api_client_id=None, **kwargs'),
+    ApiMethod('notification.get_history', 'api_client_id=None, client_login=None, since_id=None, since_time=None, '
+                                          'limit=100, order=None', read=True),
+
+    ApiMethod('subscription.subscribe_project', 'project_id', idempotent=True),
+    ApiMethod('subscription.unsubscribe_project', 'project_id', idempotent=True),
+    ApiMethod('subscription.subscribe_collection', IN_COLLECTION, COLLECTION, idempotent=True),
+    ApiMethod('subscription.unsubscribe_collection', IN_COLLECTION, COLLECTION, idempotent=True),
+    ApiMethod('subscription.get', 'api_client_id=None, client_login=None', read=True),
+)
+
+
+REQUEST_TEMPLATE = '''
+def {name}(self, {signature}):
+{checks}
+    params = {{{positional}}}
+{optional}
+{invalidate}
+'''
+
+ASYNC_TEMPLATE = REQUEST_TEMPLATE + '''
+    attrs = {{'method': {method!r}, 'params': params}}
+    if message_id:
+        attrs['message_id'] = message_id
+    return self.api_call(**attrs)
+'''
+
+SYNC_TEMPLATE = REQUEST_TEMPLATE + '''
+    formatter = {formatter}
+{lookup}
+    future = self.create_future(message_id, formatter)
+    self.api_call(method={method!r}, params=params, message_id=future.message_id)
+    if self.pipelined:
+        return future
+    return future.result()
+'''
+
+
+def annotate_result(api, fields, params, result):
+    if isinstance(api.cli.callback, ObjectCallback):
+        for field in fields:
+            setattr(result, field, params.get(field))
+    return result
+
+
+INVALIDATE_SOURCE = '''    if self.cache is not None:
+        self.cache.invalidate_call({0!r}, params)'''
+
+LOOKUP_SOURCE = '''    if self.cache is not None:
+        cached = self.cache.get({0!r}, params)
+        if cached is not None:
+            return self.cached_result(cached)
+        formatter = cache_formatter(self.cache, {0!r}, params, formatter)'''
+
+
+def check_source(spec):
+    checks = ['    assert {0}, "{1} required"'.format(' or '.join(names), ' or '.join(names)) for names in spec.one_of]
+    checks.extend('    assert {0} is not None, "{0} required"'.format(name) for name in spec.not_none)
+    return '\n'.join(checks) or '    pass'
+
+
+def compile_method(spec, template):
+    signature = ', '.join(s for s in (spec.signature, 'message_id=None', spec.kwargs and '**kwargs') if s)
+    optional = ['    if {0}{1}:\n        params[{0!r}] = {0}'.format(name, ' is not None' if name in spec.not_none else '')
+                for name in spec.optional]
+    if spec.kwargs:
+        optional.append('    params.update(kwargs)')
+    formatter = 'None'
+    if spec.annotated:
+        formatter = 'lambda r: annotate_result(self, {0!r}, params, r)'.format(spec.annotated)
+    source = template.format(name=spec.name, signature=signature, method=spec.method, formatter=formatter,
+                             checks=check_source(spec), optional='\n'.join(optional),
+                             positional=', '.join('{0!r}: {0}'.format(name) for name in spec.positional),
+                             invalidate=INVALIDATE_SOURCE.format(spec.method) if spec.invalidating else '',
+                             lookup=LOOKUP_SOURCE.format(spec.method) if spec.cached else '')
+    scope = dict(annotate_result=annotate_result, cache_formatter=cache_formatter)
+    exec(compile(source, '<syncano.schema {0}>'.format(spec.method), 'exec'), scope)
+    return scope[spec.name]
+
+
+def compile_async_method(spec):
+    return compile_method(spec, ASYNC_TEMPLATE)
+
+
+def compile_sync_method(spec):
+    return compile_method(spec, SYNC_TEMPLATE)
@@ -0,0 +1,75 @@
+import collections
+import math
+import time
+
+
+def nearest_rank(values, q):
+    if not values:
+        return None
+    return values[max(0, int(math.ceil(q / 100.0 * len(values))) - 1)]
+
+
+class ConnectionTelemetry(object):
+
+    def __init__(self, window=1000, stale_factor=3):
+        self.window = window
+        self.stale_factor = stale_factor
+        self.sent_at = {}
+        self.round_trips = collections.deque(maxlen=window)
+        self.ping_intervals = collections.deque(maxlen=window)
+        self.calls = 0
+        self.pings = 0
+        self.jitter = 0.0
+        self.last_ping_at = None
+        self.last_ping_timestamp = None
+
+    def call_sent(self, message_id):
+        self.sent_at.setdefault(message_id, time.time())
+
+    def call_answered(self, message_id):
+        sent_at = self.sent_at.pop(message_id, None)
+        if sent_at is not None:
+            self.calls += 1
+            self.round_trips.append(time.time() - sent_at)
+
+    def call_failed(self, message_id):
+        self.sent_at.pop(message_id, None)
+
+    def ping_received(self, received):
+        now = time.time()
+        if self.last_ping_at is not None:
+            interval = now - self.last_ping_at
+            if self.ping_intervals:
+                self.jitter += (abs(interval - self.ping_intervals[-1]) - self.jitter) / 16
+            self.ping_intervals.append(interval)
+        self.pings += 1
+        self.last_ping_at = now
+        self.last_ping_timestamp = received.get('timestamp')
+
+    def ping_interval(self):
+        if not self.ping_intervals:
+            return None
+        return sum(self.ping_intervals) / len(self.ping_intervals)
+
+    def is_stale(self, max_age=None):
+        if self.last_ping_at is None:
+            return False
+        if max_age is None:
+            interval = self.ping_interval()
+            if interval is None:
+                return False
+            max_age = interval * self.stale_factor
+        return time.time() - self.last_ping_at > max_age
+
+    def percentile(self, q):
+        return nearest_rank(sorted(self.round_trips), q)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        values = sorted(self.round_trips)
+        return dict((q, nearest_rank(values, q)) for q in qs)
+
+    def summary(self):
+        percentiles = self.percentiles()
+        return dict(calls=self.calls, in_flight=len(self.sent_at), p50=percentiles[50], p95=percentiles[95],
+                    p99=percentiles[99], pings=self.pings, ping_interval=self.ping_interval(),
+                    ping_jitter=self.jitter, stale=self.is_stale())
@@ -0,0 +1,883 @@
+import collections
+import datetime
+import itertools
+import json
+import logging
+import random
+import socket
+import ssl
+import string
+import threading
+import time
+import uuid
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from syncano.client import FrameDecoder
+
+
+logger = logging.getLogger('syncano.testing')
+
+DATA_STATES = ('Pending', 'Moderated', 'Rejected')
+
+
+class FakeApiError(Exception):
+    pass
+
+
+def now():
+    return datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def random_text(size, rnd=random):
+    return ''.join(rnd.choice(string.ascii_letters + ' ') for _ in range(size))
+
+
+class FakeSyncano(object):
+
+    def __init__(self, instance='testinstance', api_key='testkey'):
+        self.instance = instance
+        self.ids = itertools.count(1)
+        self.notification_ids = itertools.count(1)
+        self.roles = collections.OrderedDict((str(i), dict(id=str(i), name=name)) for i, name in
+                                             enumerate(['Admin', 'Editor', 'Viewer', 'User'], 1))
+        self.api_clients = collections.OrderedDict()
+        self.admins = collections.OrderedDict()
+        self.projects = collections.OrderedDict()
+        self.users = collections.OrderedDict()
+        self.connections = collections.OrderedDict()
+        self.subscriptions = collections.defaultdict(collections.OrderedDict)
+        self.history = collections.defaultdict(list)
+        self.admin_key = self.create_api_client(api_key, 'admin key', '1', 'backend')
+        self.create_admin('admin@' + instance, '1')
+
+    def next_id(self):
+        return str(next(self.ids))
+
+    def create_api_client(self, api_key, description, role_id, client_type='user'):
+        client = dict(id=self.next_id(), api_key=api_key, description=description, role_id=str(role_id),
+                      type=client_type)
+        self.api_clients[client['id']] = client
+        return client
+
+    def create_admin(self, email, role_id):
+        admin = dict(id=self.next_id(), email=email, role=dict(self.roles[str(role_id)]), last_login=None)
+        self.admins[admin['id']] = admin
+        return admin
+
+    def authenticate(self, instance, api_key):
+        if instance != self.instance:
+            return None
+        for client in self.api_clients.values():
+            if client['api_key'] == api_key:
+                return client
+
+    def get_or_create_user(self, user_name):
+        for user in self.users.values():
+            if user['name'] == user_name:
+                return user
+        return self.user_new(None, dict(user_name=user_name))['user']
+
+    # lookups
+
+    def get_project(self, params):
+        project = self.projects.get(str(params.get('project_id')))
+        if project is None:
+            raise FakeApiError('Project not found')
+        return project
+
+    def get_collection(self, params):
+        project = self.get_project(params)
+        if params.get('collection_id'):
+            collection = project['collections'].get(str(params['collection_id']))
+        elif params.get('collection_key'):
+            collection = next((c for c in project['collections'].values() if c['key'] == params['collection_key']),
+                              None)
+        else:
+            raise FakeApiError('collection_id or collection_key required')
+        if collection is None:
+            raise FakeApiError('Collection not found')
+        return project, collection
+
+    def get_data(self, collection, params):
+        if params.get('data_id'):
+            data = collection['data'].get(str(params['data_id']))
+        elif params.get('data_key'):
+            data = next((d for d in collection['data'].values() if d['key'] == params['data_key']), None)
+        else:
+            raise FakeApiError('data_id or data_key required')
+        if data is None:
+            raise FakeApiError('Data object not found')
+        return data
+
+    def get_user(self, params):
+        if params.get('user_id'):
+            user = self.users.get(str(params['user_id']))
+        else:
+            user = next((u for u in self.users.values() if u['name'] == params.get('user_name')), None)
+        if user is None:
+            raise FakeApiError('User not found')
+        return user
+
+    # serializers
+
+    @staticmethod
+    def project_dict(project):
+        return dict(id=project['id'], name=project['name'], description=project['description'])
+
+    @staticmethod
+    def collection_dict(collection):
+        return dict(id=collection['id'], name=collection['name'], key=collection['key'],
+                    status=collection['status'], description=collection['description'],
+                    tags=dict(collection['tags']))
+
+    @staticmethod
+    def folder_dict(folder):
+        return dict(id=folder['id'], name=folder['name'], source_id=folder['source_id'])
+
+    @staticmethod
+    def children_index(collection):
+        children = collections.defaultdict(list)
+        for data in collection['data'].values():
+            if data['parent_id'] is not None:
+                children[data['parent_id']].append(data)
+        return children
+
+    def data_dict(self, collection, data, include_children=False, children_limit=100, depth=1, children=None):
+        result = dict((k, v) for k, v in data.items() if k != 'user_id')
+        result['user'] = dict(self.users[data['user_id']]) if data['user_id'] in self.users else None
+        result['additional'] = dict(data['additional'])
+        if include_children and depth:
+            if children is None:
+                children = self.children_index(collection)
+            result['children'] = [self.data_dict(collection, c, True, children_limit, depth - 1, children)
+                                  for c in children.get(data['id'], ())[:children_limit]]
+        return result
+
+    # events
+
+    def event(self, event_type, project, collection, data, ids=None):
+        target = dict(project_id=project['id'], collection_id=collection['id'])
+        if ids is not None:
+            target['id'] = ids
+        message = dict(type=event_type, object='data', target=target)
+        if data is not None:
+            message['data'] = data
+        return (project['id'], collection['id'], message)
+
+    def subscribers(self, project_id, collection_id):
+        for api_client_id, subscriptions in self.subscriptions.items():
+            if ('Project', project_id) in subscriptions or ('Collection', collection_id) in subscriptions:
+                yield api_client_id
+
+    def record_notification(self, api_client_id, message):
+        message = dict(message, id=str(next(self.notification_ids)), timestamp=now())
+        self.history[api_client_id].append(message)
+        return message
+
+    def call(self, connection, method, params):
+        handler = getattr(self, method.replace('.', '_'), None)
+        if handler is None or method.startswith('_'):
+            raise FakeApiError('Unknown method {0}'.format(method))
+        return handler(connection, params)
+
+    # admin
+
+    def admin_new(self, connection, params):
+        return dict(admin=self.create_admin(params['admin_email'], params['role_id']))
+
+    def admin_get(self, connection, params):
+        return dict(admin=list(self.admins.values()))
+
+    def find_admin(self, params):
+        for admin in self.admins.values():
+            if admin['id'] == str(params.get('admin_id')) or admin['email'] == params.get('admin_email'):
+                return admin
+        raise FakeApiError('Admin not found')
+
+    def admin_get_one(self, connection, params):
+        return dict(admin=self.find_admin(params))
+
+    def admin_update(self, connection, params):
+        admin = self.find_admin(params)
+        admin['role'] = dict(self.roles[str(params['role_id'])])
+        return dict(admin=admin)
+
+    def admin_delete(self, connection, params):
+        del self.admins[self.find_admin(params)['id']]
+        return {}
+
+    # apikey & role
+
+    def apikey_new(self, connection, params):
+        client = self.create_api_client(uuid.uuid4().hex, params['description'], params['role_id'])
+        return dict(apikey=dict(client))
+
+    def apikey_get(self, connection, params):
+        return dict(apikey=[dict(c) for c in self.api_clients.values()])
+
+    def find_api_client(self, params):
+        client = self.api_clients.get(str(params.get('api_client_id')))
+        if client is None:
+            raise FakeApiError('Api client not found')
+        return client
+
+    def apikey_get_one(self, connection, params):
+        api_client_id = params.get('api_client_id') or connection.api_client['id']
+        return dict(apikey=dict(self.find_api_client(dict(api_client_id=api_client_id))))
+
+    def apikey_update_description(self, connection, params):
+        api_client_id = params.get('api_client_id') or connection.api_client['id']
+        client = self.find_api_client(dict(api_client_id=api_client_id))
+        client['description'] = params['description']
+        return dict(apikey=dict(client))
+
+    def apikey_delete(self, connection, params):
+        client = self.find_api_client(params)
+        del self.api_clients[client['id']]
+        return {}
+
+    def role_get(self, connection, params):
+        return dict(role=list(self.roles.values()))
+
+    # connection
+
+    def connection_get(self, connection, params):
+        connections = [c.info() for c in self.connections.values()
+                       if not params.get('api_client_id') or c.api_client['id'] == str(params['api_client_id'])]
+        if params.get('name'):
+            connections = [c for c in connections if c['name'] == params['name']]
+        return dict(connection=connections[:params.get('limit') or 100])
+
+    def connection_update(self, connection, params):
+        target = self.connections.get(params['uuid'])
+        if target is None:
+            raise FakeApiError('Connection not found')
+        if params.get('name') is not None:
+            target.name = params['name']
+        if params.get('state') is not None:
+            target.state = params['state']
+        return dict(connection=target.info())
+
+    # project
+
+    def project_new(self, connection, params):
+        project = dict(id=self.next_id(), name=params['name'], description=params.get('description', ''),
+                       collections=collections.OrderedDict())
+        self.projects[project['id']] = project
+        return dict(project=self.project_dict(project))
+
+    def project_get(self, connection, params):
+        return dict(project=[self.project_dict(p) for p in self.projects.values()])
+
+    def project_get_one(self, connection, params):
+        return dict(project=self.project_dict(self.get_project(params)))
+
+    def project_update(self, connection, params):
+        project = self.get_project(params)
+        project['name'] = params.get('name', project['name'])
+        return dict(project=self.project_dict(project))
+
+    def project_delete(self, connection, params):
+        del self.projects[self.get_project(params)['id']]
+        return {}
+
+    # collection
+
+    def collection_new(self, connection, params):
+        project = self.get_project(params)
+        collection = dict(id=self.next_id(), name=params['name'], key=params.get('key'), status='inactive',
+                          description=params.get('description', ''), tags=collections.OrderedDict(),
+                          folders=collections.OrderedDict(), data=collections.OrderedDict())
+        project['collections'][collection['id']] = collection
+        return dict(collection=self.collection_dict(collection))
+
+    def collection_get(self, connection, params):
+        project = self.get_project(params)
+        status = (params.get('status') or 'all').lower()
+        tags = set(as_list(params.get('with_tags')))
+        result = [self.collection_dict(c) for c in project['collections'].values()
+                  if (status == 'all' or c['status'] == status) and (not tags or tags & set(c['tags']))]
+        return dict(collection=result)
+
+    def collection_get_one(self, connection, params):
+        return dict(collection=self.collection_dict(self.get_collection(params)[1]))
+
+    def collection_activate(self, connection, params):
+        self.get_collection(params)[1]['status'] = 'active'
+        return {}
+
+    def collection_deactivate(self, connection, params):
+        self.get_collection(params)[1]['status'] = 'inactive'
+        return {}
+
+    def collection_update(self, connection, params):
+        collection = self.get_collection(dict(project_id=params['project_id'],
+                                              collection_id=params.get('collection_id')))[1]
+        if params.get('name'):
+            collection['name'] = params['name']
+        if params.get('collection_key'):
+            collection['key'] = params['collection_key']
+        return dict(collection=self.collection_dict(collection))
+
+    def collection_delete(self, connection, params):
+        project, collection = self.get_collection(params)
+        del project['collections'][collection['id']]
+        return {}
+
+    def collection_add_tag(self, connection, params):
+        collection = self.get_collection(params)[1]
+        if params.get('remove_other'):
+            collection['tags'].clear()
+        for tag in as_list(params.get('tags')):
+            collection['tags'][tag] = params.get('weight', 1)
+        return {}
+
+    def collection_delete_tag(self, connection, params):
+        collection = self.get_collection(params)[1]
+        for tag in as_list(params.get('tags')):
+            collection['tags'].pop(tag, None)
+        return {}
+
+    # folder
+
+    def get_folder(self, collection, name):
+        for folder in collection['folders'].values():
+            if folder['name'] == name:
+                return folder
+        raise FakeApiError('Folder not found')
+
+    def folder_new(self, connection, params):
+        collection = self.get_collection(params)[1]
+        if any(f['name'] == params['name'] for f in collection['folders'].values()):
+            raise FakeApiError('Folder already exists')
+        folder = dict(id=self.next_id(), name=params['name'], source_id=params.get('source_id'))
+        collection['folders'][folder['id']] = folder
+        return dict(folder=self.folder_dict(folder))
+
+    def folder_get(self, connection, params):
+        collection = self.get_collection(params)[1]
+        return dict(folder=[self.folder_dict(f) for f in collection['folders'].values()])
+
+    def folder_get_one(self, connection, params):
+        collection = self.get_collection(params)[1]
+        return dict(folder=self.folder_dict(self.get_folder(collection, params['folder_name'])))
+
+    def folder_update(self, connection, params):
+        collection = self.get_collection(params)[1]
+        folder = self.get_folder(collection, params['name'])
+        if params.get('new_name'):
+            for data in collection['data'].values():
+                if data['folder'] == folder['name']:
+                    data['folder'] = params['new_name']
+            folder['name'] = params['new_name']
+        if params.get('source_id'):
+            folder['source_id'] = params['source_id']
+        return dict(folder=self.folder_dict(folder))
+
+    def folder_delete(self, connection, params):
+        collection = self.get_collection(params)[1]
+        del collection['folders'][self.get_folder(collection, params['name'])['id']]
+        return {}
+
+    # data
+
+    DATA_FIELDS = ('title', 'text', 'link', 'source_url', 'folder', 'state', 'parent_id')
+    DATA_PARAMS = frozenset(['project_id', 'collection_id', 'collection_key', 'data_id', 'data_key', 'user_name',
+                             'update_method', 'image', 'image_url', 'title', 'text', 'link', 'source_url', 'folder',
+                             'state', 'parent_id'])
+
+    def apply_data_params(self, data, params, replace=False):
+        if replace:
+            for field in ('title', 'text', 'link', 'source_url', 'image'):
+                data[field] = None
+            data['additional'] = {}
+        for field in self.DATA_FIELDS:
+            if params.get(field) is not None:
+                data[field] = str(params[field]) if field == 'parent_id' else params[field]
+        if params.get('image_url') or params.get('image'):
+            data['image'] = dict(image_url=params.get('image_url') or 'data:image', image_width=0, image_height=0)
+        if params.get('user_name'):
+            data['user_id'] = self.get_or_create_user(params['user_name'])['id']
+        if data['folder'] is None:
+            raise FakeApiError('folder is required')
+        if data['state'] not in DATA_STATES:
+            raise FakeApiError('Wrong state {0}'.format(data['state']))
+        for key, value in params.items():
+            if key not in self.DATA_PARAMS:
+                data['additional'][key] = value
+
+    def new_data(self, collection, params):
+        data = dict(id=self.next_id(), created_at=now(), updated_at=now(), key=params.get('data_key'),
+                    title=None, text=None, link=None, source_url=None, image=None, folder=None, state='Pending',
+                    parent_id=None, user_id=None, additional={})
+        if params.get('folder') is None and collection['folders']:
+            params = dict(params, folder=next(iter(collection['folders'].values()))['name'])
+        self.apply_data_params(data, params)
+        collection['data'][data['id']] = data
+        return data
+
+    def data_new(self, connection, params):
+        project, collection = self.get_collection(params)
+        data = self.data_dict(collection, self.new_data(collection, params))
+        return dict(data=data), [self.event('new', project, collection, data)]
+
+    def data_update(self, connection, params):
+        project, collection = self.get_collection(params)
+        data = self.get_data(collection, params)
+        self.apply_data_params(data, params, replace=params.get('update_method', 'replace') == 'replace')
+        data['updated_at'] = now()
+        result = self.data_dict(collection, data)
+        return dict(data=result), [self.event('change', project, collection, result, [data['id']])]
+
+    def filter_data(self, collection, params):
+        items = list(collection['data'].values())
+        if params.get('data_ids'):
+            ids = set(str(i) for i in as_list(params['data_ids']))
+            items = [d for d in items if d['id'] in ids]
+        state = params.get('state') or 'All'
+        if state != 'All':
+            items = [d for d in items if d['state'] == state]
+        if params.get('folders'):
+            folders = set(as_list(params['folders']))
+            items = [d for d in items if d['folder'] in folders]
+        if params.get('by_user'):
+            user = next((u for u in self.users.values() if u['name'] == params['by_user']), None)
+            items = [d for d in items if user is not None and d['user_id'] == user['id']]
+        if params.get('parent_ids'):
+            parents = set(str(i) for i in as_list(params['parent_ids']))
+            items = [d for d in items if d['parent_id'] in parents]
+        if params.get('filter') == 'TEXT':
+            items = [d for d in items if d['text']]
+        elif params.get('filter') == 'IMAGE':
+            items = [d for d in items if d['image']]
+        return items
+
+    def data_get(self, connection, params):
+        collection = self.get_collection(params)[1]
+        items = self.filter_data(collection, params)
+        if params.get('since_id'):
+            items = [d for d in items if int(d['id']) > int(params['since_id'])]
+        if params.get('max_id'):
+            items = [d for d in items if int(d['id']) < int(params['max_id'])]
+        if params.get('since_time'):
+            items = [d for d in items if d['created_at'] >= params['since_time']]
+        order_by = params.get('order_by') or 'created_at'
+        items.sort(key=lambda d: (d.get(order_by) or '', int(d['id'])),
+                   reverse=(params.get('order') or 'ASC').upper() == 'DESC')
+        items = items[:params.get('limit') or 100]
+        include_children = params.get('include_children', True)
+        children = self.children_index(collection) if include_children else None
+        return dict(data=[self.data_dict(collection, d, include_children, params.get('children_limit') or 100,
+                                         params.get('depth') or 1, children) for d in items])
+
+    def data_get_one(self, connection, params):
+        collection = self.get_collection(params)[1]
+        return dict(data=self.data_dict(collection, self.get_data(collection, params), True))
+
+    def data_count(self, connection, params):
+        collection = self.get_collection(params)[1]
+        return dict(count=len(self.filter_data(collection, params)))
+
+    def data_move(self, connection, params):
+        project, collection = self.get_collection(params)
+        items = self.filter_data(collection, params)[:params.get('limit') or 100]
+        for data in items:
+            if params.get('new_folder'):
+                data['folder'] = params['new_folder']
+            if params.get('new_state'):
+                data['state'] = params['new_state']
+            data['updated_at'] = now()
+        events = [self.event('change', project, collection, dict(folder=d['folder'], state=d['state']), [d['id']])
+                  for d in items]
+        return {}, events
+
+    def data_copy(self, connection, params):
+        project, collection = self.get_collection(params)
+        copies = []
+        for data_id in as_list(params['data_ids']):
+            source = self.get_data(collection, dict(data_id=data_id))
+            copy = dict(source, id=self.next_id(), created_at=now(), updated_at=now(), key=None,
+                        additional=dict(source['additional']))
+            collection['data'][copy['id']] = copy
+            copies.append(self.data_dict(collection, copy))
+        return dict(data=copies), [self.event('new', project, collection, d) for d in copies]
+
+    def data_delete(self, connection, params):
+        project, collection = self.get_collection(params)
+        items = self.filter_data(collection, params)[:params.get('limit') or 100]
+        for data in items:
+            del collection['data'][data['id']]
+        if not items:
+            return {}
+        return {}, [self.event('delete', project, collection, None, [d['id'] for d in items])]
+
+    def set_parent(self, project, collection, data, parent_id, remove_other=False):
+        if parent_id is not None:
+            self.get_data(collection, dict(data_id=parent_id))
+        data['parent_id'] = str(parent_id) if parent_id is not None else None
+        data['updated_at'] = now()
+        return [self.event('change', project, collection, dict(parent_id=data['parent_id']), [data['id']])]
+
+    def data_add_parent(self, connection, params):
+        project, collection = self.get_collection(params)
+        data = self.get_data(collection, params)
+        return {}, self.set_parent(project, collection, data, params.get('parent_id'))
+
+    def data_remove_parent(self, connection, params):
+        project, collection = self.get_collection(params)
+        data = self.get_data(collection, params)
+        if params.get('parent_id') and data['parent_id'] != str(params['parent_id']):
+            return {}
+        return {}, self.set_parent(project, collection, data, None)
+
+    def data_add_child(self, connection, params):
+        project, collection = self.get_collection(params)
+        data = self.get_data(collection, params)
+        child = self.get_data(collection, dict(data_id=params['child_id']))
+        events = []
+        if params.get('remove_other'):
+            for other in collection['data'].values():
+                if other['parent_id'] == data['id'] and other['id'] != child['id']:
+                    events.extend(self.set_parent(project, collection, other, None))
+        return {}, events + self.set_parent(project, collection, child, data['id'])
+
+    def data_remove_child(self, connection, params):
+        project, collection = self.get_collection(params)
+        data = self.get_data(collection, params)
+        events = []
+        for child in list(collection['data'].values()):
+            if child['parent_id'] == data['id'] and (not params.get('child_id') or
+                                                     child['id'] == str(params['child_id'])):
+                events.extend(self.set_parent(project, collection, child, None))
+        return {}, events
+
+    # user
+
+    def user_new(self, connection, params):
+        if any(u['name'] == params['user_name'] for u in self.users.values()):
+            raise FakeApiError('User already exists')
+        user = dict(id=self.next_id(), name=params['user_name'], nick=params.get('nick'),
+                    avatar=params.get('avatar'))
+        self.users[user['id']] = user
+        return dict(user=dict(user))
+
+    def user_get_all(self, connection, params):
+        users = list(self.users.values())
+        if params.get('since_id'):
+            users = [u for u in users if int(u['id']) > int(params['since_id'])]
+        return dict(user=[dict(u) for u in users[:params.get('limit') or 100]])
+
+    def users_of(self, params):
+        collection = self.get_collection(params)[1]
+        ids = set(d['user_id'] for d in self.filter_data(collection, params))
+        return [dict(u) for u in self.users.values() if u['id'] in ids]
+
+    def user_get(self, connection, params):
+        return dict(user=self.users_of(params))
+
+    def user_get_one(self, connection, params):
+        return dict(user=dict(self.get_user(params)))
+
+    def user_update(self, connection, params):
+        user = self.get_user(params)
+        for field in ('nick', 'avatar'):
+            if params.get(field) is not None:
+                user[field] = params[field]
+        return dict(user=dict(user))
+
+    def user_count(self, connection, params):
+        if params.get('project_id'):
+            return dict(count=len(self.users_of(params)))
+        return dict(count=len(self.users))
+
+    def user_delete(self, connection, params):
+        del self.users[self.get_user(params)['id']]
+        return {}
+
+    # notification & subscription
+
+    def notification_send(self, connection, params):
+        extra = dict((k, v) for k, v in params.items() if k not in ('uuid', 'api_client_id'))
+        message = dict(type='message', object='me', data=extra)
+        if params.get('uuid'):
+            targets = [c for c in self.connections.values() if c.uuid == params['uuid']]
+        elif params.get('api_client_id'):
+            targets = [c for c in self.connections.values() if c.api_client['id'] == str(params['api_client_id'])]
+        else:
+            targets = list(self.connections.values())
+        return {}, [(None, None, message, targets)]
+
+    def notification_get_history(self, connection, params):
+        api_client_id = str(params.get('api_client_id') or connection.api_client['id'])
+        history = self.history.get(api_client_id, [])
+        if params.get('since_id'):
+            history = [n for n in history if int(n['id']) > int(params['since_id'])]
+        if params.get('since_time'):
+            history = [n for n in history if n['timestamp'] >= params['since_time']]
+        if (params.get('order') or 'ASC').upper() == 'DESC':
+            history = history[::-1]
+        return dict(history=history[:params.get('limit') or 100])
+
+    def subscription_subscribe_project(self, connection, params):
+        project = self.get_project(params)
+        self.subscriptions[connection.api_client['id']][('Project', project['id'])] = True
+        return {}
+
+    def subscription_unsubscribe_project(self, connection, params):
+        project = self.get_project(params)
+        self.subscriptions[connection.api_client['id']].pop(('Project', project['id']), None)
+        return {}
+
+    def subscription_subscribe_collection(self, connection, params):
+        collection = self.get_collection(params)[1]
+        self.subscriptions[connection.api_client['id']][('Collection', collection['id'])] = True
+        return {}
+
+    def subscription_unsubscribe_collection(self, connection, params):
+        collection = self.get_collection(params)[1]
+        self.subscriptions[connection.api_client['id']].pop(('Collection', collection['id']), None)
+        return {}
+
+    def subscription_get(self, connection, params):
+        api_client_id = str(params.get('api_client_id') or connection.api_client['id'])
+        return dict(subscription=[dict(type=kind, id=object_id)
+                                  for kind, object_id in self.subscriptions[api_client_id]])
+
+    # helpers for tests and benchmarks
+
+    def populate(self, project_id, collection_id, count, text_size=200, folder=None, seed=None):
+        rnd = random.Random(seed)
+        collection = self.get_collection(dict(project_id=project_id, collection_id=collection_id))[1]
+        if folder is None and not collection['folders']:
+            folder = 'default'
+        if folder is not None and not any(f['name'] == folder for f in collection['folders'].values()):
+            self.folder_new(None, dict(project_id=project_id, collection_id=collection_id, name=folder))
+        created = []
+        for _ in range(count):
+            created.append(self.new_data(collection, dict(folder=folder, title=random_text(20, rnd),
+                                                          text=random_text(text_size, rnd),
+                                                          state=rnd.choice(DATA_STATES),
+                                                          number=rnd.randint(0, 1000))))
+        return [d['id'] for d in created]
+
+
+class FakeConnection(object):
+
+    def __init__(self, server, sock, address):
+        self.server = server
+        self.sock = sock
+        self.address = address
+        self.uuid = str(uuid.uuid4())
+        self.api_client = None
+        self.name = ''
+        self.state = 'Ok'
+        self.created_at = now()
+        self.outgoing = queue.Queue()
+        self.closed = False
+
+    def info(self):
+        return dict(uuid=self.uuid, api_client_id=self.api_client['id'], name=self.name, state=self.state,
+                    created_at=self.created_at)
+
+    def start(self):
+        for target in (self.read_loop, self.write_loop):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+    def send(self, message, delay=0):
+        self.outgoing.put((time.time() + delay, (json.dumps(message) + '\n').encode('utf-8')))
+
+    def write_loop(self):
+        while not self.closed:
+            due, frame = self.outgoing.get()
+            if frame is None:
+                break
+            wait = due - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self.sock.sendall(frame)
+            except (socket.error, ValueError):
+                break
+        self.close()
+
+    def read_loop(self):
+        decoder = FrameDecoder()
+        try:
+            while not self.closed:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                for frame in decoder.feed(data):
+                    self.server.handle_frame(self, json.loads(frame))
+        except (socket.error, ValueError) as e:
+            logger.info(u'connection %s closed: %s', self.uuid, e)
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.outgoing.put((0, None))
+        self.server.connection_closed(self)
+        try:
+            self.sock.close()
+        except socket.error:
+            pass
+
+
+class FakeSyncanoServer(object):
+
+    def __init__(self, instance='testinstance', api_key='testkey', host='127.0.0.1', port=0, latency=0,
+                 ping_interval=None, certfile=None, keyfile=None):
+        self.instance = instance
+        self.api_key = api_key
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.ping_interval = ping_interval
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.backend = FakeSyncano(instance, api_key)
+        self.lock = threading.RLock()
+        self.listener = None
+        self.running = False
+
+    @property
+    def secure(self):
+        return self.certfile is not None
+
+    def client_kwargs(self):
+        return dict(host=self.host, port=self.port, secure=self.secure)
+
+    def start(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen(128)
+        self.port = self.listener.getsockname()[1]
+        self.ssl_context = None
+        if self.secure:
+            self.ssl_context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+            self.ssl_context.load_cert_chain(self.certfile, self.keyfile)
+        self.running = True
+        targets = [self.accept_loop]
+        if self.ping_interval:
+            targets.append(self.ping_loop)
+        for target in targets:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        try:
+            self.listener.close()
+        except socket.error:
+            pass
+        for connection in list(self.backend.connections.values()):
+            connection.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                sock, address = self.listener.accept()
+            except socket.error:
+                break
+            try:
+                if self.ssl_context is not None:
+                    sock = self.ssl_context.wrap_socket(sock, server_side=True)
+            except (socket.error, ssl.SSLError) as e:
+                logger.info(u'handshake failed: %s', e)
+                sock.close()
+                continue
+            FakeConnection(self, sock, address).start()
+
+    def ping_loop(self):
+        while self.running:
+            time.sleep(self.ping_interval)
+            with self.lock:
+                connections = list(self.backend.connections.values())
+            for connection in connections:
+                connection.send(dict(type='ping', timestamp=now()))
+
+    def drop_connections(self):
+        for connection in list(self.backend.connections.values()):
+            connection.sock.shutdown(socket.SHUT_RDWR)
+
+    def connection_closed(self, connection):
+        with self.lock:
+            self.backend.connections.pop(connection.uuid, None)
+
+    def handle_frame(self, connection, message):
+        if connection.api_client is None:
+            return self.authenticate(connection, message)
+        message_id = message.get('message_id')
+        with self.lock:
+            try:
+                result = self.backend.call(connection, message.get('method', ''), message.get('params') or {})
+            except FakeApiError as e:
+                response = dict(type='callresponse', result='NOK', data=dict(error=str(e)))
+                events = []
+            except (KeyError, TypeError, ValueError) as e:
+                response = dict(type='callresponse', result='NOK', data=dict(error='Wrong params: {0}'.format(e)))
+                events = []
+            else:
+                data, events = result if isinstance(result, tuple) else (result, [])
+                response = dict(type='callresponse', result='OK', data=data)
+            if message_id is not None:
+                response['message_id'] = message_id
+            connection.send(response, self.latency)
+            for event in events:
+                self.dispatch(event)
+
+    def dispatch(self, event):
+        if len(event) == 4:
+            _, _, message, targets = event
+            for connection in targets:
+                connection.send(message, self.latency)
+            return
+        project_id, collection_id, message = event
+        for api_client_id in self.backend.subscribers(project_id, collection_id):
+            notification = self.backend.record_notification(api_client_id, message)
+            for connection in self.backend.connections.values():
+                if connection.api_client['id'] == api_client_id:
+                    connection.send(notification, self.latency)
+
+    def authenticate(self, connection, message):
+        with self.lock:
+            client = self.backend.authenticate(message.get('instance'), message.get('api_key'))
+            if client is None:
+                connection.send(dict(type='auth', result='NOK', error='Wrong authorization data'))
+                return
+            connection.api_client = client
+            self.backend.connections[connection.uuid] = connection
+        connection.send(dict(type='auth', result='OK', uuid=connection.uuid), self.latency)
+
+    def populate(self, *args, **kwargs):
+        with self.lock:
+            return self.backend.populate(*args, **kwargs)
@@ -2,11 +2,35 @@ import unittest
 import random
 import string
 import logging
-
-from syncano.client import SyncanoApi, SyncanoAsyncApi
+import os
+import threading
+import time
+
+from syncano.cache import ResultCache
+from syncano.client import SyncanoApi, SyncanoApiPool, SyncanoAsyncApi, FrameDecoder, create_ssl_context
+from syncano.frames import FrameCallback, numpy
+from syncano.replica import CollectionReplica
 import syncano.exceptions
+try:
+    import asyncio
+    from syncano.aio import SyncanoAioApi
+except (ImportError, SyntaxError):
+    asyncio = SyncanoAioApi = None
 from syncano.callbacks import ObjectCallback
-import testconfig #variables INSTANCE, APIKEY, HOST
+from syncano.telemetry import ConnectionTelemetry
+from syncano.testing import FakeSyncanoServer
+
+try:
+    import testconfig #variables INSTANCE, APIKEY, HOST, optionally PORT and SECURE
+    INSTANCE, APIKEY = testconfig.INSTANCE, testconfig.APIKEY
+    CONNECTION = dict(host=testconfig.HOST, port=getattr(testconfig, 'PORT', None),
+                      secure=getattr(testconfig, 'SECURE', True))
+except ImportError:
+    fake_server = FakeSyncanoServer().start()
+    INSTANCE, APIKEY = fake_server.instance, fake_server.api_key
+    CONNECTION = fake_server.client_kwargs()
+
+CERTFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testcert.pem')
 
 logging.basicConfig(filename="tests.log", level=logging.INFO)
 
@@ -15,6 +39,16 @@ def id_generator(size=6, chars=string.ascii_uppercase + string.digits):
     return ''.join(random.choice(chars) for x in range(size))
 
 
+def collect_async(loop, iterator, count=None, timeout=5):
+    items = []
+    while count is None or len(items) < count:
+        try:
+            items.append(loop.run_until_complete(asyncio.wait_for(iterator.__anext__(), timeout)))
+        except StopAsyncIteration:
+            break
+    return items
+
+
 def email_generator(size=6):
     return id_generator(size) + '@' + id_generator(size) + '.' + id_generator(2, 'pldefrtgswaxdsa')
 
@@ -22,9 +56,9 @@ def email_generator(size=6):
 class SyncanoTest(object):
 
     def setUp(self):
-        self.syncano = SyncanoApi(testconfig.INSTANCE, testconfig.APIKEY, host=testconfig.HOST)
-        self.syncano_object = SyncanoApi(testconfig.INSTANCE, testconfig.APIKEY, host=testconfig.HOST,
-                                         callback_handler=ObjectCallback)
+        self.syncano = SyncanoApi(INSTANCE, APIKEY, **CONNECTION)
+        self.syncano_object = SyncanoApi(INSTANCE, APIKEY,
+                                         callback_handler=ObjectCallback, **CONNECTION)
 
     def tearDown(self):
         self.syncano.close()
@@ -66,6 +100,32 @@ class TestProjects(SyncanoTest, unittest.TestCase):
         assert any([p.name == project.name for p in projects]), "There project not updated in class"
         project.delete()
 
+    def test_04_namespaces_are_cached(self):
+        assert self.syncano.project is self.syncano.project, 'Namespace built on every access'
+        assert self.syncano.project.get is self.syncano.project.get, 'Method wrapper built on every access'
+        projects = self.syncano.project.get()
+        assert projects['result'] == 'OK', 'Namespace call failed'
+
+    def test_05_write_watermarks(self):
+        with SyncanoApi(INSTANCE, APIKEY, pipelined=True, high_watermark=2000, low_watermark=500,
+                        **CONNECTION) as syncano:
+            peak = 0
+            futures = []
+            for i in range(200):
+                futures.append(syncano.project.new(self.project + str(i)))
+                peak = max(peak, syncano.cli.pending_bytes)
+            projects = [f.result() for f in futures]
+            assert peak < 2200, 'Write buffer grew past the high watermark'
+            assert syncano.cli.queue_stats()['pauses'], 'Producer never paused'
+            for p in projects:
+                syncano.project.delete(p['data']['project']['id']).result()
+
+    def test_06_positional_host_and_port(self):
+        params = dict(CONNECTION)
+        with SyncanoApi(INSTANCE, APIKEY, params.pop('host'), params.pop('port'), **params) as syncano:
+            assert not syncano.pipelined, 'Third positional argument taken as pipelined'
+            assert syncano.project_get()['result'] == 'OK', 'Call did not return the response'
+
 
 class TestCollections(SyncanoTest, unittest.TestCase):
 
@@ -324,7 +384,197 @@ class TestDataObjects(SyncanoTest, unittest.TestCase):
                                                folder=self.folder1_name, custom=custom2)
         assert data.additional.custom == custom2, 'additional error'
 
-
+    def test_07_objectcallback_scope_from_positional_args(self):
+        self.syncano_object.data_new(self.project_id, self.collection_id, folder=self.folder1_name)
+        for d in self.syncano_object.data_get(self.project_id, self.collection_id):
+            assert d.project_id == self.project_id, 'project_id not set on result'
+            assert d.collection_id == self.collection_id, 'collection_id not set on result'
+        folder = self.syncano_object.folder_get_one(self.project_id, self.folder1_name, self.collection_id)
+        assert folder.collection_id == self.collection_id, 'collection_id not set on folder'
+
+    def test_08_bulk_data_new(self):
+        records = (dict(folder=self.folder1_name, title=str(i), state='Wrong' if i == 5 else 'Pending')
+                   for i in range(40))
+        report = self.syncano.bulk_data_new(self.project_id, records, self.collection_id, window=8)
+        assert report.count == 40 and report.errors == 1, 'Wrong bulk report'
+        assert isinstance(report.results[5], syncano.exceptions.ApiException), 'Error not kept in place'
+        assert [r['data']['data']['title'] for r in report.results if isinstance(r, dict)] == \
+            [str(i) for i in range(40) if i != 5], 'Results not in input order'
+        count = self.syncano.data_count(self.project_id, self.collection_id, folders=[self.folder1_name])
+        assert count['data']['count'] == 39, 'Bulk insert incomplete'
+
+    def test_09_iter_data(self):
+        records = (dict(folder=self.folder1_name, title=str(i)) for i in range(25))
+        self.syncano.bulk_data_new(self.project_id, records, self.collection_id)
+        ids = [d['id'] for d in self.syncano.iter_data(self.project_id, self.collection_id, page_size=10)]
+        assert len(ids) == 25 and len(set(ids)) == 25, 'Pages overlap or miss objects'
+        ids_desc = [d['id'] for d in self.syncano.iter_data(self.project_id, self.collection_id, page_size=10,
+                                                           order='DESC')]
+        assert ids_desc == ids[::-1], 'Descending scan differs'
+        objects = list(self.syncano_object.iter_data(self.project_id, self.collection_id, page_size=7))
+        assert all(o.collection_id == self.collection_id for o in objects), 'Objects not annotated'
+
+    def test_10_merge_data(self):
+        for i in range(6):
+            folder = (self.folder1_name, self.folder2_name)[i % 2]
+            self.syncano.data_new(self.project_id, self.collection_id, folder=folder, title=str(i))
+        targets = [dict(project_id=self.project_id, collection_id=self.collection_id, folders=[folder])
+                   for folder in (self.folder1_name, self.folder2_name)]
+        merged = list(self.syncano.merge_data(targets, page_size=2))
+        assert [d['title'] for d in merged] == [str(i) for i in range(6)], 'Folders not merged by created_at'
+        newest = list(self.syncano.merge_data(targets, order='DESC', limit=3))
+        assert [d['title'] for d in newest] == ['5', '4', '3'], 'Wrong descending merge with limit'
+        by_title = list(self.syncano.merge_data(targets, order_by='title', order='DESC', limit=4))
+        assert [d['title'] for d in by_title] == ['5', '4', '3', '2'], 'Wrong merge on a non-id ordering'
+        self.assertRaises(AssertionError, list, self.syncano.merge_data(targets, order_by='title'))
+        for folder in (self.folder1_name, self.folder2_name):
+            self.syncano.data_new(self.project_id, self.collection_id, folder=folder)
+        by_title = list(self.syncano.merge_data(targets, order_by='title', limit=10))
+        assert [d.get('title') for d in by_title] == [str(i) for i in range(6)] + [None, None], 'Untitled not last'
+        by_title = list(self.syncano.merge_data(targets, order_by='title', order='DESC', limit=10))
+        assert [d.get('title') for d in by_title][-3:] == ['0', None, None], 'Untitled not last when descending'
+
+    def test_11_result_cache(self):
+        cache = ResultCache(max_size=2)
+        cached = SyncanoApi(INSTANCE, APIKEY, cache=cache, **CONNECTION)
+        try:
+            data_id = self.syncano.data_new(self.project_id, self.collection_id, title='a')['data']['data']['id']
+            first = cached.data_get_one(self.project_id, self.collection_id, data_id=data_id)
+            assert cached.data_get_one(self.project_id, self.collection_id, data_id=data_id) is first, 'Cache miss'
+            cached.data_update(self.project_id, self.collection_id, data_id=data_id, title='b')
+            res = cached.data_get_one(self.project_id, self.collection_id, data_id=data_id)
+            assert res['data']['data']['title'] == 'b', 'Update did not invalidate'
+            cached.project_get_one(self.project_id)
+            cached.collection_get_one(self.project_id, collection_key=self.collection_key)
+            stats = cache.stats()
+            assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 4, 1), stats
+        finally:
+            cached.close()
+
+    def test_12_collection_replica(self):
+        for i in range(5):
+            self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, title=str(i))
+        replica = CollectionReplica(self.syncano, self.project_id, collection_key=self.collection_key, page_size=2)
+        try:
+            assert len(replica) == 5, 'Bootstrap missed objects'
+            data_id = self.syncano_object.data_new(self.project_id, self.collection_id, folder=self.folder2_name,
+                                                   state='Moderated').id
+            self.syncano_object.data_update(self.project_id, self.collection_id, data_id=data_id, title='x',
+                                            folder=self.folder2_name, state='Rejected')
+            deadline = time.time() + 5
+            while replica.count(state='Rejected') != 1 and time.time() < deadline:
+                replica.refresh(0.1)
+            assert [d['title'] for d in replica.query(folders=[self.folder2_name], state='Rejected')] == ['x']
+            assert [d['title'] for d in replica.query(folders=[self.folder1_name], order='DESC', limit=2)] == \
+                ['4', '3'], 'Wrong index query'
+            assert replica.stats()['applied'] == 2, replica.stats()
+        finally:
+            replica.close()
+
+    @unittest.skipIf(numpy is None, 'numpy not installed')
+    def test_13_load_frame(self):
+        for i in range(7):
+            self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, title=str(i),
+                                  state=('Pending', 'Moderated')[i % 2], price=i)
+        frame = self.syncano.load_frame(self.project_id, self.collection_id, page_size=3)
+        assert list(frame['title']) == [str(i) for i in range(7)], 'Pages missing or out of order'
+        assert frame.count_by('state') == {'Moderated': 3, 'Pending': 4}, 'Wrong group counts'
+        assert frame.aggregate('state', 'price') == {'Moderated': 9, 'Pending': 12}, 'Wrong aggregate'
+        moderated = frame[frame['state'] == 'Moderated'].sort('price', descending=True)
+        objects = moderated.to_objects(self.syncano_object)
+        assert [o.title for o in objects] == ['5', '3', '1'], 'Wrong filter or sort'
+        assert objects[0].collection_id == self.collection_id and objects[0].additional.price == 5
+        frames_api = SyncanoApi(INSTANCE, APIKEY, callback_handler=FrameCallback, **CONNECTION)
+        try:
+            page = frames_api.data_get(self.project_id, self.collection_id, limit=2)
+            assert len(page) == 2 and page['id'].dtype.kind == 'i', 'data.get not decoded into columns'
+        finally:
+            frames_api.close()
+
+    def test_14_result_objects_are_lazy(self):
+        data = self.syncano_object.data_new(self.project_id, self.collection_id, folder=self.folder1_name,
+                                            title='a', price='10')
+        fetched = self.syncano_object.data_get_one(self.project_id, self.collection_id, data_id=data.id)
+        assert isinstance(fetched.as_dict()['additional'], dict), 'Nested object built before access'
+        assert fetched.additional.price == '10' and fetched.additional is fetched.additional
+        assert fetched.get('missing', 1) == 1 and 'title' in dir(fetched)
+        fetched.update(title='b')
+        assert fetched.title == 'b' and fetched.collection_id == self.collection_id, 'update lost fields'
+        fetched.label = 'x'
+        del fetched.label
+        assert not hasattr(fetched, 'label') and not hasattr(fetched, '__dict__')
+
+    def test_15_iter_result_builds_objects_on_demand(self):
+        for i in range(5):
+            self.syncano_object.data_new(self.project_id, self.collection_id, folder=self.folder1_name,
+                                         title=str(i))
+        result = self.syncano_object.data_get(self.project_id, self.collection_id, folders=self.folder1_name)
+        assert len(result) == 5 and result.objects.count(None) == 5, 'Objects built before access'
+        first, last = result[0], result[-1]
+        assert result[0] is first and result.objects.count(None) == 3
+        assert first.project_id == self.project_id and first.collection_id == self.collection_id
+        assert [d.title for d in result[1:3]] == ['1', '2'] and result.objects[3] is None
+        assert [d.title for d in result] == ['0', '1', '2', '3', '4'] and result.items[4] is last
+        self.assertRaises(IndexError, lambda: result[5])
+
+    def test_16_result_cache_in_flight_read(self):
+        cache = ResultCache()
+        cached = SyncanoApi(INSTANCE, APIKEY, cache=cache, pipelined=True, **CONNECTION)
+        try:
+            data_id = self.syncano.data_new(self.project_id, self.collection_id, title='old')['data']['data']['id']
+            in_flight = cached.data_get_one(self.project_id, self.collection_id, data_id=data_id)
+            cached.data_update(self.project_id, self.collection_id, data_id=data_id, title='new').result()
+            assert in_flight.result()['data']['data']['title'] == 'old'
+            res = cached.data_get_one(self.project_id, self.collection_id, data_id=data_id).result()
+            assert res['data']['data']['title'] == 'new', 'Read sent before the update was cached'
+            assert cache.stats()['stale_puts'] == 1, cache.stats()
+            res = cached.data_get_one(self.project_id, self.collection_id, data_id=data_id).result()
+            assert res['data']['data']['title'] == 'new' and cache.stats()['hits'] == 1, 'Fresh read not cached'
+        finally:
+            cached.close()
+
+    def test_17_replica_on_lazy_pipelined_client(self):
+        for i in range(3):
+            self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, title=str(i))
+        with SyncanoApi(INSTANCE, APIKEY, lazy=True, pipelined=True, **CONNECTION) as syncano:
+            with CollectionReplica(syncano, self.project_id, collection_key=self.collection_key) as replica:
+                assert [d['title'] for d in replica] == ['0', '1', '2'], 'Replica not loaded'
+
+    @unittest.skipIf(numpy is None, 'numpy not installed')
+    def test_18_frame_missing_values(self):
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, title='b', price=2)
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, user_name='bob')
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, title='a', price=5)
+        with SyncanoApi(INSTANCE, APIKEY, lazy=True, **CONNECTION) as syncano:
+            frame = syncano.load_frame(self.project_id, self.collection_id)
+        assert frame.count_by('user_name') == {'bob': 1, None: 2}, 'Anonymous rows not grouped'
+        assert list(frame.group_by('title')) == ['a', 'b', None], 'Missing titles not grouped last'
+        assert [r['title'] for r in frame.sort('title', descending=True).rows()] == ['b', 'a', None]
+        assert frame.count_by('price') == {2: 1, 5: 1, None: 1}, 'Integer keys came back as floats'
+        prices = [o.additional.get('price') for o in frame.to_objects(self.syncano_object)]
+        assert prices == [2, None, 5] and type(prices[0]) is int, 'Integer field not restored'
+
+    def test_19_replica_keeps_existing_subscription(self):
+        parent_id = self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name,
+                                          title='p')['data']['data']['id']
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, title='c',
+                              parent_id=parent_id)
+        self.syncano.subscription_subscribe_collection(self.project_id, collection_id=self.collection_id)
+        with CollectionReplica(self.syncano, self.project_id, collection_key=self.collection_key) as replica:
+            assert [d['title'] for d in replica.query(folders=self.folder1_name)] == ['p', 'c'], 'Scalar folder'
+            assert [d['title'] for d in replica.query(parent_ids=parent_id)] == ['c'], 'Scalar parent_id'
+        subs = self.syncano.subscription_get()['data']['subscription']
+        assert [s['type'] for s in subs] == ['Collection'], 'Replica dropped existing subscription'
+        self.syncano.subscription_unsubscribe_collection(self.project_id, collection_id=self.collection_id)
+
+    @unittest.skipIf(numpy is None, 'numpy not installed')
+    def test_20_frame_unhashable_values(self):
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, tags=['a', 'b'])
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, tags=['c', 'd'])
+        self.syncano.data_new(self.project_id, self.collection_id, folder=self.folder1_name, tags='e')
+        with SyncanoApi(INSTANCE, APIKEY, lazy=True, **CONNECTION) as syncano:
+            frame = syncano.load_frame(self.project_id, self.collection_id)
+        assert [r['additional']['tags'] for r in frame.rows()] == [['a', 'b'], ['c', 'd'], 'e'], 'List values not kept'
 
     def tearDown(self):
         self.syncano.folder_delete(self.project_id, self.folder1_name, collection_id=self.collection_id,
@@ -416,7 +666,7 @@ class TestNotifications(SyncanoTest, unittest.TestCase):
 
     def test_01_notification_send(self):
         message = id_generator()
-        with SyncanoAsyncApi(testconfig.INSTANCE, self.client.api_key, host=testconfig.HOST, name="NOTIFICATION_GETTER") as syncano2:
+        with SyncanoAsyncApi(INSTANCE, self.client.api_key, name="NOTIFICATION_GETTER", **CONNECTION) as syncano2:
             import time
             time.sleep(2)
             self.syncano.notification_send(syncano2.cli.uuid, self.client.id, custom_message=message)
@@ -437,6 +687,12 @@ class TestNotifications(SyncanoTest, unittest.TestCase):
             else:
                 assert 0, 'Couldnt get the message in reasonable time'
 
+    def test_03_auth_response_not_queued(self):
+        with SyncanoAsyncApi(INSTANCE, APIKEY, **CONNECTION) as syncano:
+            syncano.project_get(message_id='first')
+            message = syncano.get_message()
+            assert message.get('message_id') == 'first', 'Got {0!r} before the call response'.format(message)
+
     def _test_02_notification_history_get_collection_history(self):
         collection_name = id_generator()
         collection_key = id_generator()
@@ -503,12 +759,168 @@ class TestSubscriptions(SyncanoTest, unittest.TestCase):
         subscriptions = self.syncano_object.subscription_get()
         assert len(subscriptions) == 0, "Subscriptions not deleted"
 
+    def test_04_get_for_api_client(self):
+        api_client_id = self.syncano.apikey_get_one()['data']['apikey']['id']
+        self.syncano.subscription_subscribe_project(self.project_id)
+        subs = self.syncano.subscription_get(api_client_id=api_client_id)
+        assert any([x['type'] == 'Project' and x['id'] == self.project_id for x in subs['data']['subscription']]),\
+            "No sub"
+        self.syncano.subscription_unsubscribe_project(self.project_id)
+
+    def test_05_tail_notifications(self):
+        folder = id_generator()
+        self.syncano.folder_new(self.project_id, folder, self.collection_id)
+        self.syncano.subscription_subscribe_project(self.project_id)
+        last = self.syncano.notification_get_history(limit=1, order='DESC')['data']['history']
+        since_id = last[0]['id'] if last else None
+        for i in range(3):
+            self.syncano.data_new(self.project_id, self.collection_id, folder=folder, title=str(i))
+        ids = []
+        for message in self.syncano.tail_notifications(since_id=since_id, page_size=2, timeout=0.5):
+            ids.append(int(message['id']))
+        assert len(ids) == 3, 'Notifications lost or repeated between history and live messages'
+        assert ids == sorted(ids), 'Notifications out of order'
+        self.syncano.subscription_unsubscribe_project(self.project_id)
+
+    def test_06_tail_notifications_pipelined(self):
+        self.syncano.subscription_subscribe_project(self.project_id)
+        with SyncanoApi(INSTANCE, APIKEY, pipelined=True, **CONNECTION) as syncano:
+            last = syncano.notification_get_history(limit=1, order='DESC').result()['data']['history']
+            folder = id_generator()
+            self.syncano.folder_new(self.project_id, folder, self.collection_id)
+            self.syncano.data_new(self.project_id, self.collection_id, folder=folder, title='pushed')
+            messages = list(syncano.tail_notifications(since_id=last[0]['id'] if last else None, timeout=0.2))
+            assert len(messages) == 1, 'History not read through a pipelined client'
+        self.syncano.subscription_unsubscribe_project(self.project_id)
+
+    def test_07_tail_notifications_objectcallback(self):
+        folder = id_generator()
+        self.syncano.folder_new(self.project_id, folder, self.collection_id)
+        self.syncano.subscription_subscribe_project(self.project_id)
+        last = self.syncano.notification_get_history(limit=1, order='DESC')['data']['history']
+        self.syncano.data_new(self.project_id, self.collection_id, folder=folder, title='history')
+        tail = self.syncano_object.tail_notifications(since_id=last[0]['id'] if last else None, timeout=0.5)
+        first = next(tail)
+        self.syncano.data_new(self.project_id, self.collection_id, folder=folder, title='live')
+        messages = [first] + list(tail)
+        assert [m['data']['title'] for m in messages] == ['history', 'live'], 'Mixed types or lost messages'
+        self.syncano.subscription_unsubscribe_project(self.project_id)
+
     def tearDown(self):
         self.syncano.collection_delete(self.project_id, self.collection_id)
         self.syncano.project_delete(self.project_id)
         super(TestSubscriptions, self).tearDown()
 
 
+@unittest.skipIf(SyncanoAioApi is None, 'asyncio client needs Python 3.5+')
+class TestAioApi(SyncanoTest, unittest.TestCase):
+
+    def setUp(self):
+        super(TestAioApi, self).setUp()
+        self.project_id = self.syncano.project_new(id_generator())['data']['project']['id']
+        self.collection_id = self.syncano.collection_new(self.project_id, id_generator(),
+                                                         id_generator())['data']['collection']['id']
+        self.syncano.collection_activate(self.project_id, self.collection_id)
+        self.folder = id_generator()
+        self.syncano.folder_new(self.project_id, self.folder, self.collection_id)
+        self.loop = asyncio.new_event_loop()
+        self.aio = SyncanoAioApi(INSTANCE, APIKEY, loop=self.loop, **CONNECTION)
+        self.loop.run_until_complete(self.aio.connect(timeout=10))
+
+    def test_01_gather(self):
+        futures = [self.aio.data_new(self.project_id, self.collection_id, folder=self.folder, title=str(i))
+                   for i in range(20)]
+        results = self.loop.run_until_complete(asyncio.gather(*futures))
+        assert [r['data']['data']['title'] for r in results] == [str(i) for i in range(20)], 'Responses mixed up'
+
+    def test_02_errors(self):
+        future = self.aio.data_get_one(self.project_id, self.collection_id, data_id='999999999')
+        self.assertRaises(syncano.exceptions.ApiException, self.loop.run_until_complete, future)
+        result = self.loop.run_until_complete(self.aio.project_get_one(self.project_id))
+        assert result['data']['project']['id'] == self.project_id, 'Connection unusable after an error'
+
+    def test_03_iter_data(self):
+        futures = [self.aio.data_new(self.project_id, self.collection_id, folder=self.folder, title=str(i))
+                   for i in range(7)]
+        self.loop.run_until_complete(asyncio.gather(*futures))
+        items = collect_async(self.loop, self.aio.iter_data(self.project_id, self.collection_id, page_size=3))
+        assert [item['title'] for item in items] == [str(i) for i in range(7)], 'Pages lost or repeated'
+
+    def test_04_notifications(self):
+        self.loop.run_until_complete(self.aio.subscription_subscribe_collection(self.project_id, self.collection_id))
+        self.loop.run_until_complete(self.aio.data_new(self.project_id, self.collection_id, folder=self.folder,
+                                                       title='pushed'))
+        messages = collect_async(self.loop, self.aio.notifications(), count=1)
+        assert messages[0]['type'] == 'new' and messages[0]['data']['title'] == 'pushed', \
+            'Auth or call responses leaked into notifications'
+        assert self.aio.cli.notifications.empty(), 'Unexpected messages queued'
+
+    def test_05_without_callback(self):
+        aio = SyncanoAioApi(INSTANCE, APIKEY, loop=self.loop, callback_handler=None, **CONNECTION)
+        try:
+            self.loop.run_until_complete(aio.connect(timeout=5))
+            result = self.loop.run_until_complete(aio.project_get_one(self.project_id))
+            assert result['data']['project']['id'] == self.project_id, 'Raw response not returned'
+        finally:
+            aio.close()
+
+    def test_06_iter_data_objects(self):
+        self.loop.run_until_complete(asyncio.gather(*[
+            self.aio.data_new(self.project_id, self.collection_id, folder=self.folder, title=str(i)) for i in range(5)]))
+        aio = SyncanoAioApi(INSTANCE, APIKEY, loop=self.loop, callback_handler=ObjectCallback, **CONNECTION)
+        try:
+            self.loop.run_until_complete(aio.connect(timeout=5))
+            items = collect_async(self.loop, aio.iter_data(self.project_id, self.collection_id, page_size=2))
+            assert [item.title for item in items] == [str(i) for i in range(5)], 'Object pages not followed'
+        finally:
+            aio.close()
+
+    def tearDown(self):
+        self.aio.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+        self.syncano.collection_delete(self.project_id, self.collection_id)
+        self.syncano.project_delete(self.project_id)
+        super(TestAioApi, self).tearDown()
+
+
+class TestApiPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SyncanoApiPool(INSTANCE, APIKEY, size=3, **CONNECTION)
+
+    def test_01_threads_share_the_pool(self):
+        names = [id_generator() for _ in range(40)]
+        created, errors = {}, []
+
+        def worker(chunk):
+            try:
+                for name in chunk:
+                    project = self.pool.project_new(name)['data']['project']
+                    fetched = self.pool.project.get_one(project['id'])['data']['project']
+                    created[name] = fetched['name']
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(names[i::8],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+        assert not errors, errors
+        assert all(created.get(name) == name for name in names), 'Responses crossed between threads'
+        assert self.pool.in_flight == [0, 0, 0], 'In-flight counters leaked'
+        for name in names:
+            project_id = [p['id'] for p in self.pool.project_get()['data']['project'] if p['name'] == name][0]
+            self.pool.project_delete(project_id)
+
+    def test_02_pipelined_rejected(self):
+        self.assertRaises(AssertionError, SyncanoApiPool, INSTANCE, APIKEY, size=1, pipelined=True, **CONNECTION)
+
+    def tearDown(self):
+        self.pool.close()
+
+
 class TestAdmin(SyncanoTest, unittest.TestCase):
 
     def test_01_admin_new(self):
@@ -560,12 +972,192 @@ class TestApikey(SyncanoTest, unittest.TestCase):
         keys = self.syncano_object.apikey_get()
         assert not any([key.id == k.id for k in keys]), "deleted apikey in list"
 
+    def test_02_clear_description(self):
+        key = self.syncano.apikey_new(2, id_generator())['data']['apikey']
+        self.syncano.apikey_update_description(key['id'], '')
+        assert self.syncano.apikey_get_one(key['id'])['data']['apikey']['description'] == '', 'Description not cleared'
+        self.assertRaises(AssertionError, self.syncano.apikey_update_description, key['id'])
+        self.syncano.apikey_delete(key['id'])
+
+
+class TestFrameDecoder(unittest.TestCase):
+
+    def test_01_many_frames_in_one_read(self):
+        decoder = FrameDecoder()
+        frames = decoder.feed(u'{"a": 1}\n{"b": 2}\n{"c"'.encode('utf-8'))
+        assert frames == [u'{"a": 1}', u'{"b": 2}'], 'Frames not split'
+        assert decoder.feed(u': 3}\n'.encode('utf-8')) == [u'{"c": 3}'], 'Partial frame not joined'
+
+    def test_02_split_multibyte_characters(self):
+        decoder = FrameDecoder()
+        data = u'{"name": "za\u017c\u00f3\u0142\u0107"}\n'.encode('utf-8')
+        frames = []
+        for i in range(len(data)):
+            frames.extend(decoder.feed(data[i:i + 1]))
+        assert frames == [data.decode('utf-8')[:-1]], 'Multibyte characters broken'
+
+
+class TestWriteQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.syncano = SyncanoAsyncApi(INSTANCE, APIKEY, **CONNECTION)
+        self.cli = self.syncano.cli
+        self.frames = [self.cli.codec.dump_frame(dict(type='call', method='project.get', message_id=str(i)))
+                       for i in range(3)]
+        for i in range(3):
+            self.cli.write_to_buffer(dict(type='call', method='project.get', message_id=str(i)))
+
+    def tearDown(self):
+        self.syncano.close()
+
+    def test_01_partial_sends_across_frame_boundaries(self):
+        first, second, third = [len(f) for f in self.frames]
+        self.cli.clean_buffer(first - 1)
+        assert len(self.cli.frames_out) == 3 and self.cli.frame_offset == first - 1, 'Head frame popped early'
+        self.cli.clean_buffer(second + 2)
+        assert list(self.cli.frame_ids) == ['2'] and self.cli.frame_offset == 1, 'Offset not carried over'
+        assert self.cli.pending_bytes == third - 1, 'Pending bytes out of sync'
+        self.cli.clean_buffer(third - 1)
+        assert not self.cli.frames_out and self.cli.frame_offset == 0 and self.cli.pending_bytes == 0
+
+    def test_02_ssl_batches_are_bounded(self):
+        data = b''.join(self.frames)
+        self.cli.clean_buffer(5)
+        assert bytes(self.cli.ssl_batch()) == data[5:], 'Frames not joined into one TLS write'
+        self.cli.ssl_batch_size = len(data) - 6
+        assert bytes(self.cli.ssl_batch()) == data[5:len(self.frames[0]) + len(self.frames[1])]
+        self.cli.ssl_retry_size = len(self.frames[0]) - 5
+        assert bytes(self.cli.ssl_batch()) == data[5:len(self.frames[0])], 'Retry must resend the same bytes'
+
+
+class TestReconnect(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSyncanoServer(latency=0.1).start()
+        self.syncano = SyncanoApi(self.server.instance, self.server.api_key, pipelined=True, reconnect=True,
+                                  reconnect_delay=0.01, max_reconnect_attempts=3, **self.server.client_kwargs())
+        self.project_id = self.syncano.project_new(id_generator()).result()['data']['project']['id']
+
+    def tearDown(self):
+        self.syncano.close()
+        self.server.stop()
+
+    def send_and_drop(self, *futures):
+        while self.syncano.cli.frames_out:
+            self.syncano.cli.poll(0.01)
+        time.sleep(0.02)
+        self.server.drop_connections()
+        return futures
+
+    def test_01_reads_replayed_writes_failed(self):
+        read, write = self.send_and_drop(self.syncano.project_get_one(self.project_id),
+                                         self.syncano.project_new(id_generator()))
+        assert read.result(10)['data']['project']['id'] == self.project_id, 'Read not replayed'
+        self.assertRaises(syncano.exceptions.ConnectionLost, write.result, 10)
+        assert self.syncano.cli.authorized and self.syncano.cli.reconnect_attempts == 0, 'Not reauthorized'
+
+    def test_02_subscriptions_restored(self):
+        self.syncano.subscription_subscribe_project(self.project_id).result()
+        self.send_and_drop()
+        with self.server.lock:
+            self.server.backend.subscriptions.clear()
+        subscriptions = self.syncano.subscription_get().result(10)['data']['subscription']
+        assert [s['id'] for s in subscriptions] == [self.project_id], 'Subscription not restored'
+
+    def test_04_telemetry_forgets_failed_calls(self):
+        self.syncano.subscription_subscribe_project(self.project_id).result()
+        cancelled = self.syncano.project_get()
+        self.syncano.cli.poll(0.01)
+        cancelled.cancel()
+        self.send_and_drop(self.syncano.project_new(id_generator()), self.syncano.project_get())[1].result(10)
+        self.syncano.project_get().result(10)
+        assert self.syncano.cli.telemetry.summary()['in_flight'] == 0, 'Failed or internal calls left in flight'
+
+    def test_03_backoff_gives_up(self):
+        self.server.stop()
+        future = self.syncano.project_get()
+        self.assertRaises(syncano.exceptions.ConnectionLost, future.result, 10)
+        assert self.syncano.cli.reconnect_attempts == 3, 'Attempts not bounded by max_reconnect_attempts'
+
+
+class TestAsyncReconnect(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSyncanoServer(latency=0.1).start()
+        self.syncano = SyncanoAsyncApi(self.server.instance, self.server.api_key, reconnect=True,
+                                       reconnect_delay=0.01, **self.server.client_kwargs())
+
+    def tearDown(self):
+        self.syncano.close()
+        self.server.stop()
+
+    def test_01_unanswered_calls_after_reconnect(self):
+        self.syncano.project_new(id_generator(), message_id='write')
+        self.syncano.project_get(message_id='read')
+        while self.syncano.cli.frames_out:
+            self.syncano.cli.poll(0.01)
+        time.sleep(0.02)
+        self.server.drop_connections()
+        assert self.syncano.get_message(message_id='read')['result'] == 'OK', 'Read not replayed'
+        self.assertRaises(syncano.exceptions.ConnectionLost, self.syncano.get_message, message_id='write')
+
+
+class TestTLS(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSyncanoServer(certfile=CERTFILE).start()
+        self.connection = self.server.client_kwargs()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_01_calls_and_session_reuse(self):
+        with SyncanoApi(self.server.instance, self.server.api_key, pipelined=True, **self.connection) as syncano:
+            futures = [syncano.project_new(id_generator()) for _ in range(50)]
+            assert all(f.result()['result'] == 'OK' for f in futures), 'Batched TLS writes lost calls'
+        with SyncanoApi(self.server.instance, self.server.api_key, **self.connection) as syncano:
+            assert syncano.cli.socket.session_reused, 'TLS session not offered on the next connection'
+
+    def test_02_separate_contexts(self):
+        with SyncanoApi(self.server.instance, self.server.api_key, **self.connection) as syncano:
+            syncano.project_get()
+        context = create_ssl_context()
+        with SyncanoApi(self.server.instance, self.server.api_key, ssl_context=context, **self.connection) as syncano:
+            assert syncano.project_get()['result'] == 'OK', 'Call over a second context failed'
+            assert not syncano.cli.socket.session_reused, 'Session from another context offered'
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def test_01_round_trip_percentiles(self):
+        telemetry = ConnectionTelemetry()
+        for i in range(1, 101):
+            telemetry.sent_at[str(i)] = 0
+            telemetry.round_trips.append(i / 1000.0)
+        assert telemetry.percentiles() == {50: 0.05, 95: 0.095, 99: 0.099}, 'Wrong percentiles'
+        telemetry.call_sent('x')
+        telemetry.call_answered('x')
+        assert telemetry.calls == 1 and 'x' not in telemetry.sent_at, 'Round trip not recorded'
+        telemetry.call_sent('y')
+        telemetry.call_failed('y')
+        assert telemetry.calls == 1 and 'y' not in telemetry.sent_at, 'Failed call counted or kept'
+
+    def test_02_ping_jitter_and_staleness(self):
+        telemetry = ConnectionTelemetry()
+        assert not telemetry.is_stale(), 'Stale without any ping'
+        telemetry.ping_received({'timestamp': '1'})
+        telemetry.ping_received({'timestamp': '2'})
+        assert telemetry.pings == 2 and telemetry.ping_interval() is not None, 'Ping interval not measured'
+        telemetry.last_ping_at -= 10
+        assert telemetry.is_stale(max_age=5), 'Connection should be stale'
 
 
 if __name__ == '__main__':
     suite = unittest.TestSuite()
     for t in (TestIdentity, TestAdmin, TestApikey, TestRole, TestDataObjects, TestProjects,
-              TestUsers, TestFolders, TestNotifications, TestSubscriptions, TestCollections):
+              TestUsers, TestFolders, TestNotifications, TestSubscriptions, TestAioApi, TestApiPool,
+              TestCollections, TestFrameDecoder, TestWriteQueue, TestReconnect, TestAsyncReconnect,
+              TestTLS, TestTelemetry):
         suite.addTest(unittest.TestLoader().loadTestsFromTestCase(t))
     result = unittest.TextTestRunner(verbosity=2).run(suite)
     exit(len(result.errors) or len(result.failures))